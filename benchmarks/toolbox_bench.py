@@ -0,0 +1,402 @@
+"""
+Benchmarks for the toolbox scripts.
+
+Generates a synthetic directory tree from a seed, times each tool's core
+function on it and reports files/s, MB/s and peak RSS as JSON. Results can
+be saved and compared against a saved baseline; the run fails when a
+benchmark got slower than the allowed threshold.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import random
+import argparse
+import platform
+import tempfile
+import contextlib
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TOOLS = {
+    "tree": os.path.join(REPO_ROOT, "directory-tools", "tree_visualizer.py"),
+    "flatten": os.path.join(REPO_ROOT, "file-management-tools", "file_flattener.py"),
+    "annotate": os.path.join(REPO_ROOT, "code-annotation-tools", "file_path_annotator.py"),
+}
+
+# Folder names the generator scatters through the tree and the tools ignore
+IGNORED_DIR_NAMES = ["node_modules", "build", "__pycache__"]
+
+DEFAULT_EXTENSIONS = [".py", ".ts", ".js", ".md", ".json", ".png", ".log"]
+DEFAULT_IGNORED_EXTENSIONS = [".log"]
+ANNOTATE_EXTENSIONS = {".py", ".ts", ".js", ".md", ".json"}
+
+BENCHMARKS = [
+    "walk",
+    "tree.build",
+    "tree.stream",
+    "tree.sizes",
+    "flatten.copy",
+    "flatten.incremental",
+    "annotate.first",
+    "annotate.rerun",
+    "pipeline.sequential",
+    "pipeline.fused",
+]
+
+# Size of the seeded text block file contents are cut from
+TEXT_BLOCK_SIZE = 256 * 1024
+
+
+# --- Tree generation -------------------------------------------------------
+
+def parse_size_dist(spec):
+    """Parse "fixed:N", "uniform:MIN:MAX" or "lognormal:MEDIAN:SIGMA" into a sampler."""
+    kind, _, rest = spec.partition(":")
+    try:
+        values = [float(v) for v in rest.split(":")] if rest else []
+    except ValueError:
+        raise ValueError(f"Bad size distribution: {spec}")
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: int(values[0])
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.randint(int(values[0]), int(values[1]))
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda rng: max(0, int(rng.lognormvariate(mu, values[1])))
+    raise ValueError(f"Bad size distribution: {spec}")
+
+
+def text_block(rng):
+    """Return TEXT_BLOCK_SIZE bytes of seeded, line-structured ASCII text."""
+    words = ["alpha", "beta", "gamma", "delta", "return", "const", "value", "index", "self", "data"]
+    lines = []
+    size = 0
+    while size < TEXT_BLOCK_SIZE:
+        line = " ".join(rng.choice(words) for _ in range(rng.randint(2, 12)))
+        lines.append(line)
+        size += len(line) + 1
+    return ("\n".join(lines) + "\n").encode("ascii")[:TEXT_BLOCK_SIZE]
+
+
+def file_content(rng, block, size):
+    start = rng.randrange(len(block))
+    data = block[start:start + size]
+    while len(data) < size:
+        data += block[:size - len(data)]
+    return data
+
+
+def generate_tree(root, seed=0, fanout=4, depth=4, files_per_dir=8, size_dist="lognormal:4096:1.0",
+                  extensions=None, ignored_dirs=2):
+    """Create a synthetic tree under root and return its shape and file list.
+
+    Every folder down to depth gets fanout subfolders and files_per_dir
+    files with extensions drawn from extensions. ignored_dirs folders named
+    like IGNORED_DIR_NAMES (each holding files_per_dir files) are placed in
+    random folders. The same arguments always produce the same tree.
+
+    Returns a dict with "files", a list of (rel_path, size, in_ignored_dir)
+    tuples, and "dirs", the number of folders created.
+    """
+    rng = random.Random(seed)
+    sample_size = parse_size_dist(size_dist)
+    extensions = extensions or DEFAULT_EXTENSIONS
+    block = text_block(rng)
+    files = []
+    dirs = [""]
+
+    def add_files(rel_dir, ignored):
+        for i in range(files_per_dir):
+            rel_path = os.path.join(rel_dir, f"file_{i:03d}{rng.choice(extensions)}")
+            size = sample_size(rng)
+            with open(os.path.join(root, rel_path), "wb") as f:
+                f.write(file_content(rng, block, size))
+            files.append((rel_path.replace(os.sep, "/"), size, ignored))
+
+    os.makedirs(root, exist_ok=True)
+    level = [""]
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(fanout):
+                rel_dir = os.path.join(parent, f"dir_{i:02d}")
+                os.mkdir(os.path.join(root, rel_dir))
+                next_level.append(rel_dir)
+        dirs.extend(next_level)
+        level = next_level
+
+    for rel_dir in dirs:
+        add_files(rel_dir, False)
+
+    for i in range(ignored_dirs):
+        parent = rng.choice(dirs)
+        rel_dir = os.path.join(parent, IGNORED_DIR_NAMES[i % len(IGNORED_DIR_NAMES)])
+        if os.path.exists(os.path.join(root, rel_dir)):
+            continue
+        os.mkdir(os.path.join(root, rel_dir))
+        add_files(rel_dir, True)
+
+    return {"files": files, "dirs": len(dirs)}
+
+
+# --- Running benchmarks ----------------------------------------------------
+
+def load_tool(name):
+    """Import one of the toolbox scripts as a module."""
+    spec = importlib.util.spec_from_file_location(f"bench_{name}", TOOLS[name])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class CountingNode:
+    """Stand-in for rich.tree.Tree, so build_tree is timed without rendering."""
+
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, label):
+        self.count += 1
+        return self
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_benchmark(name, tree_root, work_dir, repeat, ignore_dirs, ignore_exts):
+    """Time one benchmark repeat times and return {"times": [...], "peak_rss_kb": ...}.
+
+    Runs in a fresh worker process, so the peak RSS belongs to this
+    benchmark alone. Tool output is discarded; setup steps such as copying
+    the tree for the annotator are not timed.
+    """
+    tool = load_tool(name.split(".")[0]) if name != "walk" and not name.startswith("pipeline") else None
+    sys.path.insert(0, REPO_ROOT)
+    from toolbox_common.walker import IgnoreMatcher, walk
+    from toolbox_common import pipeline
+
+    def fresh_copy():
+        copy = os.path.join(work_dir, "copy")
+        shutil.rmtree(copy, ignore_errors=True)
+        shutil.copytree(tree_root, copy)
+        return copy
+
+    def fresh_dest():
+        dest = os.path.join(work_dir, "dest")
+        shutil.rmtree(dest, ignore_errors=True)
+        return dest
+
+    times = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            args = None
+            if name == "flatten.copy":
+                args = fresh_dest()
+            elif name == "flatten.incremental":
+                # Time the no-op run over an up-to-date destination
+                args = fresh_dest()
+                tool.copy_and_rename_files(tree_root, args, ignore_dirs, ignore_exts, incremental=True)
+            elif name.startswith("pipeline"):
+                args = fresh_copy(), fresh_dest()
+            elif name.startswith("annotate"):
+                args = fresh_copy()
+                if name == "annotate.rerun":
+                    tool.process_directory(args, ANNOTATE_EXTENSIONS, set(ignore_dirs))
+
+            start = time.perf_counter()
+            if name == "walk":
+                for _ in walk(tree_root, IgnoreMatcher(ignore_dirs, ignore_exts)):
+                    pass
+            elif name == "tree.build":
+                tool.build_tree(tree_root, CountingNode(), ignore_dirs, ignore_exts)
+            elif name == "tree.stream":
+                for _ in tool.iter_tree_lines(tree_root, ignore_dirs, ignore_exts):
+                    pass
+            elif name == "tree.sizes":
+                tool.compute_dir_sizes(tree_root, ignore_dirs, ignore_exts)
+            elif name == "pipeline.sequential":
+                # The three tools one after another, each walking the tree itself
+                source, dest = args
+                pipeline.tool("annotate").process_directory(source, ANNOTATE_EXTENSIONS, set(ignore_dirs))
+                pipeline.tool("flatten").copy_and_rename_files(source, dest, ignore_dirs, ignore_exts)
+                for _ in pipeline.tool("tree").iter_tree_lines(source, ignore_dirs, ignore_exts):
+                    pass
+            elif name == "pipeline.fused":
+                source, dest = args
+                stages = [pipeline.AnnotateStage(ANNOTATE_EXTENSIONS), pipeline.FlattenStage(dest),
+                          pipeline.TreeStage(os.devnull)]
+                pipeline.Pipeline(source, stages, ignore_dirs, ignore_exts).run()
+            elif name.startswith("flatten"):
+                tool.copy_and_rename_files(tree_root, args, ignore_dirs, ignore_exts,
+                                           incremental=name == "flatten.incremental")
+            else:
+                tool.process_directory(args, ANNOTATE_EXTENSIONS, set(ignore_dirs))
+            times.append(time.perf_counter() - start)
+
+    return {"times": times, "peak_rss_kb": peak_rss_kb()}
+
+
+def workload(name, tree, ignore_exts):
+    """Return the (files, bytes) a benchmark processes, for the rate figures."""
+    ignore_exts = tuple(ignore_exts)
+    files = [(path, size) for path, size, ignored in tree["files"] if not ignored and not path.endswith(ignore_exts)]
+    if name.startswith("annotate"):
+        files = [(path, size) for path, size, ignored in tree["files"]
+                 if not ignored and os.path.splitext(path)[1] in ANNOTATE_EXTENSIONS]
+    return len(files), sum(size for _, size in files)
+
+
+def run_suite(benchmarks, tree_options, ignore_exts, repeat=3):
+    """Generate the tree, run every benchmark and return the JSON report.
+
+    tree_options are passed to generate_tree; ignore_exts are the
+    extensions the tools are told to skip.
+    """
+    ignore_dirs = list(IGNORED_DIR_NAMES)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "tree": dict(tree_options),
+            "ignore_exts": list(ignore_exts),
+            "created": time.time(),
+        },
+        "results": {},
+    }
+
+    # Spawned workers start clean, so each peak RSS is measured from scratch
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="toolbox-bench-") as tmp:
+        tree_root = os.path.join(tmp, "tree")
+        tree = generate_tree(tree_root, **tree_options)
+        report["meta"]["tree_files"] = len(tree["files"])
+        report["meta"]["tree_dirs"] = tree["dirs"]
+
+        for name in benchmarks:
+            work_dir = os.path.join(tmp, "work")
+            os.makedirs(work_dir, exist_ok=True)
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                run = pool.submit(run_benchmark, name, tree_root, work_dir, repeat,
+                                  ignore_dirs, ignore_exts).result()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+            files, size = workload(name, tree, ignore_exts)
+            best = min(run["times"])
+            report["results"][name] = {
+                "files": files,
+                "bytes": size,
+                "seconds": round(best, 6),
+                "median_seconds": round(sorted(run["times"])[len(run["times"]) // 2], 6),
+                "files_per_s": round(files / best, 1) if best else None,
+                "mb_per_s": round(size / best / 1e6, 2) if best else None,
+                "peak_rss_kb": run["peak_rss_kb"],
+            }
+            print(f"{name:<20} {files / best:>12,.0f} files/s  {size / best / 1e6:>8.2f} MB/s",
+                  file=sys.stderr)
+    return report
+
+
+def compare(report, baseline, threshold):
+    """Compare files/s with a baseline report; return the names that regressed.
+
+    A benchmark regresses when its throughput dropped by more than
+    threshold percent. Benchmarks missing from either report are skipped.
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old or not old.get("files_per_s") or not result.get("files_per_s"):
+            continue
+        change = (result["files_per_s"] - old["files_per_s"]) / old["files_per_s"] * 100
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<20} {old['files_per_s']:>12,.0f} -> {result['files_per_s']:>12,.0f} files/s "
+              f"({change:+.1f}%){flag}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the toolbox scripts on a synthetic tree.")
+    parser.add_argument("--bench", nargs="*", choices=BENCHMARKS, default=BENCHMARKS,
+                        help="Benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark; the best counts (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the tree generator (default: 0)")
+    parser.add_argument("--fanout", type=int, default=4, help="Subfolders per folder (default: 4)")
+    parser.add_argument("--depth", type=int, default=4, help="Folder levels below the root (default: 4)")
+    parser.add_argument("--files-per-dir", type=int, default=8, help="Files in every folder (default: 8)")
+    parser.add_argument("--size-dist", default="lognormal:4096:1.0",
+                        help="File sizes: fixed:N, uniform:MIN:MAX or lognormal:MEDIAN:SIGMA "
+                             "(default: lognormal:4096:1.0)")
+    parser.add_argument("--extensions", nargs="*", default=DEFAULT_EXTENSIONS,
+                        help="Extensions given to generated files")
+    parser.add_argument("--ignored-dirs", type=int, default=2,
+                        help=f"Ignored folders ({', '.join(IGNORED_DIR_NAMES)}) placed in the tree (default: 2)")
+    parser.add_argument("--ignore-ext", nargs="*", default=DEFAULT_IGNORED_EXTENSIONS,
+                        help="Extensions the tools are told to ignore (default: .log)")
+    parser.add_argument("--output", metavar="FILE", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare with a saved report")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Allowed files/s drop against the baseline, in percent (default: 10)")
+
+    args = parser.parse_args()
+    tree_options = {
+        "seed": args.seed,
+        "fanout": args.fanout,
+        "depth": args.depth,
+        "files_per_dir": args.files_per_dir,
+        "size_dist": args.size_dist,
+        "extensions": args.extensions,
+        "ignored_dirs": args.ignored_dirs,
+    }
+    try:
+        parse_size_dist(args.size_dist)
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = run_suite(args.bench, tree_options, args.ignore_ext, repeat=args.repeat)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        old_meta = baseline.get("meta", {})
+        if (old_meta.get("tree"), old_meta.get("ignore_exts")) != (report["meta"]["tree"], report["meta"]["ignore_exts"]):
+            print("Warning: the baseline was run on a different tree shape", file=sys.stderr)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:g}%: "
+                  f"{', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,22 @@
 @echo off
 cd /d "%~dp0"
 
+rem Usage: build_exe.bat [fast]
+rem   default: dist\Python-Toolbox-GUI.exe, a single portable file that unpacks
+rem            itself to a temp folder on every launch
+rem   fast:    dist\Python-Toolbox-GUI\ folder with the .exe next to its files;
+rem            nothing is unpacked, so it starts much faster (copy the whole folder)
+if /i "%~1"=="fast" (
+    set MODE=--onedir --noupx
+) else (
+    set MODE=--onefile
+)
+
+rem The warm worker loads the tool scripts from these folders at run time, and
+rem their standard-library imports are not visible to PyInstaller's analysis
+set DATA=--add-data "directory-tools;directory-tools" --add-data "code-annotation-tools;code-annotation-tools" --add-data "file-management-tools;file-management-tools"
+set HIDDEN=--hidden-import argparse --hidden-import concurrent.futures --hidden-import gzip --hidden-import hashlib --hidden-import shutil --hidden-import tarfile --hidden-import tempfile --hidden-import zipfile
+
 echo Installing required packages...
 if exist ".venv\Scripts\pip.exe" (
     .venv\Scripts\pip.exe install rich pyinstaller
@@ -11,11 +27,15 @@ if exist ".venv\Scripts\pip.exe" (
 echo.
 echo Creating executable...
 if exist ".venv\Scripts\pyinstaller.exe" (
-    .venv\Scripts\pyinstaller.exe --onefile --windowed --name "Python-Toolbox-GUI" python_toolbox_gui.py
+    .venv\Scripts\pyinstaller.exe %MODE% --windowed --name "Python-Toolbox-GUI" %DATA% %HIDDEN% python_toolbox_gui.py
 ) else (
-    pyinstaller --onefile --windowed --name "Python-Toolbox-GUI" python_toolbox_gui.py
+    pyinstaller %MODE% --windowed --name "Python-Toolbox-GUI" %DATA% %HIDDEN% python_toolbox_gui.py
 )
 
 echo.
-echo Build complete! The executable will be in the 'dist' folder.
+if /i "%~1"=="fast" (
+    echo Build complete! Run dist\Python-Toolbox-GUI\Python-Toolbox-GUI.exe and keep the folder together.
+) else (
+    echo Build complete! The executable will be in the 'dist' folder.
+)
 pause
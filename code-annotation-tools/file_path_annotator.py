@@ -1,9 +1,19 @@
 
 # example: python3 /home/fadi/Documents/python-toolbox/code-annotation-tools/file_path_annotator.py '/home/fadi/Documents/portfolio-website' --ignore node_modules public .git .husky .next
 import os
+import sys
+import json
 import shutil
 import argparse
+import contextlib
 import re
+from collections import deque, namedtuple
+
+# The shared walker lives in toolbox_common at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolbox_common import progress, startup, stats
+from toolbox_common.gitignore import make_matcher
+from toolbox_common.walker import walk
 
 # Extensions to process by default
 DEFAULT_EXTENSIONS = ['.ts', '.tsx']
@@ -35,74 +45,480 @@ COMMENT_PATTERNS = {
     '.md': r'^<!-- File: (.+) -->$',
 }
 
+# Number of leading lines searched for an existing comment
+HEADER_LINES = 5
+
+# Longest header line read while looking for a comment
+HEADER_LINE_LIMIT = 4096
+
+# Chunk size used when streaming a file body into its rewritten copy
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Default cache file, stored in the base folder
+CACHE_NAME = ".path_annotator_cache.json"
+CACHE_VERSION = 1
+
+# A supported language: its comment template and the compiled pattern that
+# finds an existing comment anywhere in the header (matched line by line)
+Language = namedtuple('Language', ['template', 'pattern'])
+
+def template_to_pattern(template):
+    """Derive the regex for a comment template, e.g. '# File: {}' -> '^# File: (.+)$'."""
+    prefix, _, suffix = template.partition('{}')
+    return f"^{re.escape(prefix)}(.+){re.escape(suffix)}$"
+
+def build_registry(styles, patterns):
+    """Compile one Language per extension from the template and pattern tables."""
+    registry = {}
+    for ext, template in styles.items():
+        pattern = patterns.get(ext) or template_to_pattern(template)
+        registry[ext] = Language(template, re.compile(pattern, re.MULTILINE))
+    return registry
+
+# Extension -> Language, built once at startup
+LANGUAGES = build_registry(COMMENT_STYLES, COMMENT_PATTERNS)
+
+def load_languages(config_path):
+    """Add or override languages from a JSON config file.
+
+    The file maps extensions to a comment template, or to an object with a
+    "comment" template and an optional "pattern" regex:
+
+        {".go": "// File: {}", ".sql": {"comment": "-- File: {}"}}
+
+    Raises ValueError for malformed entries.
+    """
+    global LANGUAGES
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{config_path}: expected an object mapping extensions to comment styles")
+
+    for ext, spec in config.items():
+        if isinstance(spec, str):
+            spec = {"comment": spec}
+        template = spec.get("comment") if isinstance(spec, dict) else None
+        if not isinstance(template, str) or template.count('{}') != 1:
+            raise ValueError(f"{config_path}: '{ext}' needs a comment template containing {{}} once")
+        if not ext.startswith('.'):
+            ext = f'.{ext}'
+        COMMENT_STYLES[ext] = template
+        COMMENT_PATTERNS[ext] = spec.get("pattern") or template_to_pattern(template)
+
+    LANGUAGES = build_registry(COMMENT_STYLES, COMMENT_PATTERNS)
+
 def is_supported_file(filename, allowed_extensions):
     return os.path.splitext(filename)[1] in allowed_extensions
 
 def find_existing_comment(lines, ext):
-    """Find existing file comment in the first 5 lines and return its line number and path."""
-    pattern = COMMENT_PATTERNS.get(ext)
-    if not pattern:
+    """Find existing file comment in the header lines and return its line number and path."""
+    language = LANGUAGES.get(ext)
+    if not language:
         return None, None
-    
-    for i, line in enumerate(lines[:5]):  # Check only first 5 lines
-        match = re.match(pattern, line.strip())
-        if match:
-            return i, match.group(1)  # Return line number and extracted path
+
+    # Match the whole header in one pass instead of one regex call per line
+    header = '\n'.join(line.strip() for line in lines[:HEADER_LINES])
+    match = language.pattern.search(header)
+    if match:
+        # Return line number and extracted path
+        return header.count('\n', 0, match.start()), match.group(1)
     return None, None
 
-def add_or_update_comment(file_path, relative_path):
-    ext = os.path.splitext(file_path)[1]
-    comment_template = COMMENT_STYLES.get(ext)
-    if not comment_template:
-        print(f"Skipping unsupported extension: {file_path}")
+def read_header(f):
+    """Read up to HEADER_LINES lines from a binary file object.
+
+    Stops early at a line longer than HEADER_LINE_LIMIT, leaving the file
+    positioned right after the bytes that were read.
+    """
+    lines = []
+    for _ in range(HEADER_LINES):
+        line = f.readline(HEADER_LINE_LIMIT)
+        if not line:
+            break
+        lines.append(line)
+        if not line.endswith(b'\n'):
+            break
+    return lines
+
+def line_ending(line):
+    return b'\r\n' if line.endswith(b'\r\n') else b'\n'
+
+def install_temp(tmp_path, target):
+    """Make tmp_path's content the content of target, keeping target's identity.
+
+    target must be a real file (not a symlink) on the same file system. A
+    file with other hard links is overwritten in place, since swapping would
+    detach the other names; otherwise the temp file takes over target's
+    mode, owner and extended attributes and is swapped in with os.replace.
+    """
+    st = os.stat(target)
+    if st.st_nlink > 1:
+        with open(tmp_path, 'rb') as src, open(target, 'r+b') as out:
+            shutil.copyfileobj(src, out, COPY_CHUNK_SIZE)
+            out.truncate()
+        os.remove(tmp_path)
         return
+    shutil.copystat(target, tmp_path)
+    # copystat also copied the old timestamps; the file has just changed
+    os.utime(tmp_path)
+    try:
+        os.chown(tmp_path, st.st_uid, st.st_gid)
+    except (AttributeError, PermissionError):
+        pass
+    os.replace(tmp_path, target)
+
+def rewrite_file(file_path, header, body_offset):
+    """Replace file_path with header followed by its bytes from body_offset on.
 
+    The body is streamed into a temp file next to the original, which is then
+    swapped in with install_temp, so memory use does not depend on file size
+    and a failed write never leaves a half-written file behind. A symlinked
+    file_path rewrites the file it points to.
+    """
+    target = os.path.realpath(file_path)
+    tmp_path = make_temp(target)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        if not lines:
-            # Empty file, just add the comment
-            new_content = comment_template.format(relative_path) + '\n'
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
-            print(f"Annotated empty file: {file_path}")
-            return
+        with stats.current.phase("write"):
+            with open(tmp_path, 'wb') as out, open(target, 'rb') as src:
+                out.writelines(header)
+                src.seek(body_offset)
+                shutil.copyfileobj(src, out, COPY_CHUNK_SIZE)
+                written = out.tell()
+            install_temp(tmp_path, target)
+        stats.current.count("files_written")
+        stats.current.count("bytes_written", written)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def plan_comment(file_path, relative_path, header):
+    """Work out how the path comment changes a file whose first lines are header.
+
+    Returns (status, new_header, patch). new_header is None when the file
+    is already up to date. patch is (offset, line) when the new comment is
+    as long as the old one and can be written over it in place; otherwise
+    it is None and the file needs new_header followed by its old body.
+    """
+    ext = os.path.splitext(file_path)[1]
+    new_comment = LANGUAGES[ext].template.format(relative_path).encode('utf-8')
+
+    if not header:
+        # Empty file, just add the comment
+        return f"Annotated empty file: {file_path}", [new_comment + b'\n'], None
+
+    # A line cut off at HEADER_LINE_LIMIT is never treated as a comment
+    lines = [line.decode('utf-8') if line.endswith(b'\n') or len(line) < HEADER_LINE_LIMIT else ''
+             for line in header]
+    comment_line_num, existing_path = find_existing_comment(lines, ext)
+
+    if comment_line_num is None:
+        # No existing comment found, add new one at the beginning
+        return f"Added new comment: {file_path}", [new_comment + line_ending(header[0])] + header, None
+
+    if existing_path == relative_path:
+        return f"Already up-to-date: {file_path}", None, None
+
+    old_line = header[comment_line_num]
+    new_line = new_comment + line_ending(old_line)
+    status = f"Updated path comment: {file_path} (was: {existing_path}, now: {relative_path})"
+    new_header = header[:comment_line_num] + [new_line] + header[comment_line_num + 1:]
+    patch = None
+    if len(new_line) == len(old_line):
+        patch = (sum(len(line) for line in header[:comment_line_num]), new_line)
+    return status, new_header, patch
+
+def update_comment(file_path, relative_path):
+    """Add or update the path comment in one file and return its status line.
+
+    Only the first HEADER_LINES lines are read. Files that are already up to
+    date are not touched; a comment of the same length is overwritten in
+    place, and anything else streams the body through a temp file.
+    """
+    if os.path.splitext(file_path)[1] not in LANGUAGES:
+        return f"Skipping unsupported extension: {file_path}"
+
+    with stats.current.phase("read"), open(file_path, 'rb') as f:
+        header = read_header(f)
+        body_offset = f.tell()
+    stats.current.count("files_read")
+    stats.current.count("bytes_read", body_offset)
+
+    status, new_header, patch = plan_comment(file_path, relative_path, header)
+    if new_header is None:
+        return status
+
+    if patch is not None:
+        # Same size: overwrite just this line without touching the rest
+        offset, new_line = patch
+        with stats.current.phase("write"), open(file_path, 'r+b') as f:
+            f.seek(offset)
+            f.write(new_line)
+        stats.current.count("files_written")
+        stats.current.count("bytes_written", len(new_line))
+        return status
 
-        comment_line_num, existing_path = find_existing_comment(lines, ext)
-        new_comment = comment_template.format(relative_path)
-
-        if comment_line_num is not None:
-            # Found existing comment
-            if existing_path == relative_path:
-                print(f"Already up-to-date: {file_path}")
-                return
-            else:
-                # Update existing comment
-                lines[comment_line_num] = new_comment + '\n'
-                print(f"Updated path comment: {file_path} (was: {existing_path}, now: {relative_path})")
-        else:
-            # No existing comment found, add new one at the beginning
-            lines.insert(0, new_comment + '\n')
-            print(f"Added new comment: {file_path}")
-
-        # Write the updated content back to file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.writelines(lines)
+    # Write the updated header and stream the rest of the file after it
+    rewrite_file(file_path, new_header, body_offset)
+    return status
 
+def make_temp(path):
+    """Create an empty temp file next to path and return its name."""
+    import tempfile
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                    prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    os.close(fd)
+    return tmp_path
+
+def annotate_copy(file_path, relative_path, copies):
+    """Like update_comment, and also write the annotated file to every path in copies.
+
+    The file is read only once: its body is streamed into the rewritten
+    file and all copies together, and a file that is already up to date is
+    copied from the same open handle. Copies get the file's final mode and
+    timestamps, like shutil.copy2.
+
+    Every output is written to a temp file and swapped in with os.replace.
+    A copy path left by an earlier hardlink or symlink run is the source
+    file itself, and writing through it would truncate the source.
+    """
+    if os.path.splitext(file_path)[1] not in LANGUAGES:
+        return f"Skipping unsupported extension: {file_path}"
+    if not copies:
+        return update_comment(file_path, relative_path)
+
+    # (temp file, path it replaces) for every output
+    pending = []
+    try:
+        with open(file_path, 'rb') as src:
+            with stats.current.phase("read"):
+                header = read_header(src)
+            status, new_header, patch = plan_comment(file_path, relative_path, header)
+
+            for copy in copies:
+                pending.append((make_temp(copy), copy))
+            rewrite = new_header is not None and patch is None
+            if rewrite:
+                # A symlinked source is rewritten where it points
+                target = os.path.realpath(file_path)
+                pending.append((make_temp(target), target))
+            read = write_copies(src, new_header or header, [tmp_path for tmp_path, _ in pending])
+        stats.current.count("files_read")
+        stats.current.count("bytes_read", read)
+
+        # Settle the source first, so the copies can take its final mode and times
+        if patch is not None:
+            offset, new_line = patch
+            with stats.current.phase("write"), open(file_path, 'r+b') as f:
+                f.seek(offset)
+                f.write(new_line)
+        elif rewrite:
+            tmp_path, target = pending[-1]
+            install_temp(tmp_path, target)
+            pending.pop()
+        while pending:
+            tmp_path, copy = pending[0]
+            shutil.copystat(file_path, tmp_path)
+            os.replace(tmp_path, copy)
+            pending.pop(0)
+    except BaseException:
+        for tmp_path, _ in pending:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        raise
+    return status
+
+def write_copies(src, header, paths):
+    """Write header and then the rest of src to every path in paths; return the bytes read from src."""
+    read = sum(len(line) for line in header)
+    with stats.current.phase("write"), contextlib.ExitStack() as stack:
+        outs = [stack.enter_context(open(path, 'wb')) for path in paths]
+        for out in outs:
+            out.writelines(header)
+        while True:
+            chunk = src.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            read += len(chunk)
+            for out in outs:
+                out.write(chunk)
+        written = sum(out.tell() for out in outs)
+    stats.current.count("files_written", len(paths))
+    stats.current.count("bytes_written", written)
+    return read
+
+def annotate_file(file_path, relative_path):
+    """Like update_comment, but report failures as a status line."""
+    try:
+        with stats.current.track_file(file_path, "annotate"):
+            return update_comment(file_path, relative_path)
+    except Exception as e:
+        return f"Failed to process {file_path}: {e}"
+
+def add_or_update_comment(file_path, relative_path):
+    print(annotate_file(file_path, relative_path))
+
+def styles_fingerprint():
+    """Hash of the comment templates; a cache built with other templates is stale."""
+    import hashlib
+    data = json.dumps([COMMENT_STYLES, COMMENT_PATTERNS, HEADER_LINES], sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def load_cache(cache_path):
+    """Load the annotation cache, or return an empty one if missing or stale."""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache {cache_path}: {e}")
+        return {}
+    if data.get("version") != CACHE_VERSION or data.get("styles") != styles_fingerprint():
+        return {}
+    return data.get("files", {})
+
+def save_cache(cache_path, files):
+    """Atomically write the annotation cache."""
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": CACHE_VERSION, "styles": styles_fingerprint(), "files": files}, f)
+    os.replace(tmp_path, cache_path)
+
+def cache_record(st, comment):
+    return [st.st_size, st.st_mtime_ns, st.st_ino, comment]
+
+def expected_comment(file_path, relative_path):
+    language = LANGUAGES.get(os.path.splitext(file_path)[1])
+    return language.template.format(relative_path) if language else None
+
+def annotate_and_stat(file_path, relative_path):
+    """Annotate one file and return (status, stat) with stat None on failure."""
+    try:
+        with stats.current.track_file(file_path, "annotate"):
+            status = update_comment(file_path, relative_path)
+        return status, os.stat(file_path)
     except Exception as e:
-        print(f"Failed to process {file_path}: {e}")
+        return f"Failed to process {file_path}: {e}", None
+
+def iter_files(base_dir, allowed_extensions, ignored_folders, respect_gitignore=False):
+    """Yield (full_path, rel_path, entry) for every supported file under base_dir.
+
+    entry is the WalkEntry from the shared walker, so callers can check its
+    cached stat and inode without extra system calls. With
+    respect_gitignore, paths excluded by .gitignore/.ignore files are skipped.
+    """
+    for entry in walk(base_dir, make_matcher(base_dir, ignored_folders, respect_gitignore=respect_gitignore)):
+        if not entry.is_dir and is_supported_file(entry.name, allowed_extensions):
+            yield entry.path, entry.rel_path, entry
+
+def count_work(base_dir, allowed_extensions, ignored_folders, respect_gitignore=False):
+    """Return the (files, bytes) process_directory will look at, for progress totals."""
+    matcher = make_matcher(base_dir, ignored_folders, respect_gitignore=respect_gitignore)
+    return progress.prescan(base_dir, matcher, lambda entry: is_supported_file(entry.name, allowed_extensions))
+
+def process_directory(base_dir, allowed_extensions, ignored_folders, jobs=1, cache_path=None,
+                      respect_gitignore=False):
+    """Annotate every supported file under base_dir.
+
+    With jobs > 1 files are annotated on a bounded thread pool while the
+    walk continues. Status lines are printed in walk order, the same as a
+    serial run.
+
+    With cache_path, each file's (size, mtime_ns, inode) and the comment it
+    got are stored there. Files whose stat still matches are skipped without
+    being opened. Entries for files that are gone are dropped, and the whole
+    cache is discarded when COMMENT_STYLES or COMMENT_PATTERNS change.
+
+    respect_gitignore is passed on to iter_files.
+    """
+    cache = {}
+    if cache_path:
+        with stats.current.phase("cache"):
+            cache = load_cache(cache_path)
+    new_cache = {}
+    cached = 0
+
+    def is_cached(full_path, rel_path, entry):
+        record = cache.get(rel_path)
+        if record is None:
+            return False
+        try:
+            st = entry.stat()
+            inode = entry.inode()
+        except OSError:
+            return False
+        if record[:3] != [st.st_size, st.st_mtime_ns, inode]:
+            return False
+        if record[3] != expected_comment(full_path, rel_path):
+            return False
+        new_cache[rel_path] = record
+        return True
 
-def process_directory(base_dir, allowed_extensions, ignored_folders):
-    for root, dirs, files in os.walk(base_dir):
-        # Modify dirs in-place to exclude ignored folders
-        dirs[:] = [d for d in dirs if d not in ignored_folders]
+    def report(full_path, rel_path, result):
+        status, st = result
+        progress.current.advance(full_path, st.st_size if st is not None else None)
+        # With progress events only failures are printed
+        if st is None or not progress.current.enabled:
+            with stats.current.phase("print"):
+                print(status)
+        if cache_path and st is not None:
+            new_cache[rel_path] = cache_record(st, expected_comment(full_path, rel_path))
 
-        for file in files:
-            if is_supported_file(file, allowed_extensions):
-                full_path = os.path.join(root, file)
-                rel_path = os.path.relpath(full_path, base_dir)
-                add_or_update_comment(full_path, rel_path)
+    files = iter_files(base_dir, allowed_extensions, ignored_folders, respect_gitignore)
+    if cache_path:
+        # The default cache lives in base_dir; it must never be annotated itself
+        cache_file = os.path.abspath(cache_path)
+        files = (item for item in files if os.path.abspath(item[0]) != cache_file)
+
+    if jobs <= 1:
+        for full_path, rel_path, entry in files:
+            if cache_path and is_cached(full_path, rel_path, entry):
+                cached += 1
+                progress.current.advance(full_path, entry.stat().st_size)
+                continue
+            report(full_path, rel_path, annotate_and_stat(full_path, rel_path))
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Drain the oldest result first so output order matches the walk
+        max_pending = jobs * 4
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            for full_path, rel_path, entry in files:
+                if cache_path and is_cached(full_path, rel_path, entry):
+                    cached += 1
+                    progress.current.advance(full_path, entry.stat().st_size)
+                    continue
+                pending.append((full_path, rel_path, pool.submit(annotate_and_stat, full_path, rel_path)))
+                if len(pending) >= max_pending:
+                    full, rel, future = pending.popleft()
+                    report(full, rel, future.result())
+            while pending:
+                full, rel, future = pending.popleft()
+                report(full, rel, future.result())
+
+    if cache_path:
+        stats.current.count("cache_hits", cached)
+        print(f"Skipped {cached} unchanged file(s) using the cache.")
+        try:
+            with stats.current.phase("cache"):
+                save_cache(cache_path, new_cache)
+        except Exception as e:
+            print(f"Failed to write cache {cache_path}: {e}")
+
+def make_working_copy(base_folder):
+    """Copy base_folder to base_folder + "_copy", replacing an old copy, and return the copy's path."""
+    copy_folder = base_folder + "_copy"
+    if os.path.exists(copy_folder):
+        shutil.rmtree(copy_folder)
+    shutil.copytree(base_folder, copy_folder)
+    print(f"Copied {base_folder} to {copy_folder}")
+    return copy_folder
 
 def main():
     parser = argparse.ArgumentParser(description="Annotate files with their relative paths.")
@@ -112,19 +528,42 @@ def main():
                         help="List of file extensions to include, e.g. .ts .tsx .js")
     parser.add_argument("--ignore", nargs='*', default=list(IGNORED_FOLDERS),
                         help="List of folders to ignore.")
+    parser.add_argument("--respect-gitignore", action="store_true",
+                        help="Also skip paths excluded by .gitignore and .ignore files.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Number of files to annotate in parallel (default: 1).")
+    parser.add_argument("--languages", metavar="CONFIG",
+                        help="JSON file with extra comment styles, e.g. {\".go\": \"// File: {}\"}.")
+    parser.add_argument("--cache", nargs='?', const='', default=None, metavar="PATH",
+                        help=f"Skip files unchanged since the last run. The cache is stored at PATH "
+                             f"(default: {CACHE_NAME} in the base folder).")
+    stats.add_arguments(parser)
+    progress.add_arguments(parser)
+    startup.add_arguments(parser)
 
     args = parser.parse_args()
     base_folder = os.path.abspath(args.base_folder)
 
+    if args.languages:
+        try:
+            load_languages(args.languages)
+        except (OSError, ValueError) as e:
+            print(f"Failed to load languages from {args.languages}: {e}")
+            return
+
     if args.makeCopy:
-        copy_folder = base_folder + "_copy"
-        if os.path.exists(copy_folder):
-            shutil.rmtree(copy_folder)
-        shutil.copytree(base_folder, copy_folder)
-        print(f"Copied {base_folder} to {copy_folder}")
-        base_folder = copy_folder
-
-    process_directory(base_folder, args.extensions, set(args.ignore))
+        base_folder = make_working_copy(base_folder)
+
+    cache_path = None
+    if args.cache is not None:
+        cache_path = os.path.abspath(args.cache) if args.cache else os.path.join(base_folder, CACHE_NAME)
+
+    def count():
+        return count_work(base_folder, set(args.extensions), set(args.ignore), args.respect_gitignore)
+
+    with stats.collecting(args), progress.reporting(args, "annotate", count):
+        process_directory(base_folder, set(args.extensions), set(args.ignore), jobs=args.jobs,
+                          cache_path=cache_path, respect_gitignore=args.respect_gitignore)
 
 if __name__ == "__main__":
     main()
@@ -1,34 +1,546 @@
 import os
+import sys
+import json
+import time
 import argparse
-from rich.console import Console
-from rich.tree import Tree
 
-def build_tree(dir_path, tree, ignore_folders, ignore_exts):
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolbox_common import progress, startup, stats, walker
+from toolbox_common.gitignore import make_matcher
+from toolbox_common.walker import walk
+
+class WalkBudget:
+    """Global limit on how many entries a walk may show and for how long.
+
+    Either limit may be None. Once exhausted the budget stays exhausted.
+    """
+
+    def __init__(self, max_entries=None, max_seconds=None):
+        self.remaining = max_entries
+        self.deadline = None if max_seconds is None else time.monotonic() + max_seconds
+        self.exhausted = False
+
+    def spend(self):
+        """Account for one shown entry; return False once the budget is used up."""
+        if self.exhausted:
+            return False
+        if self.remaining is not None:
+            if self.remaining <= 0:
+                self.exhausted = True
+                return False
+            self.remaining -= 1
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.exhausted = True
+            return False
+        return True
+
+def rel_dir_for(path, matcher):
+    """Return path relative to the matcher's root, for matchers that have one (.gitignore rules)."""
+    if matcher.root is None:
+        return ""
+    rel_dir = os.path.relpath(path, matcher.root)
+    return "" if rel_dir == "." else rel_dir
+
+def scan_dir(path, matcher, file_stats=None):
+    """List one directory as sorted (kind, name, path) tuples.
+
+    kind is "dir", "ignored" (an ignored folder), "link" (a symlinked
+    folder, which is shown but not walked) or "file"; files the
+    IgnoreMatcher skips are left out. The listing comes from the shared
+    walker, so no extra stat call is made per entry. Raises OSError if the
+    directory cannot be read.
+
+    If file_stats is a dict it is filled with {path: (size, 1, mtime)} for
+    every listed file, in the same shape as compute_dir_sizes.
+    """
+    result = []
+    for entry in walker.scan_dir(path, matcher, rel_dir_for(path, matcher)):
+        if entry.is_dir:
+            if entry.ignored:
+                kind = "ignored"
+            elif entry.is_symlink():
+                kind = "link"
+            else:
+                kind = "dir"
+            result.append((kind, entry.name, entry.path))
+            continue
+        result.append(("file", entry.name, entry.path))
+        if file_stats is not None:
+            try:
+                st = entry.stat()
+                file_stats[entry.path] = (st.st_size, 1, st.st_mtime)
+            except OSError:
+                pass
+    return result
+
+def compute_dir_sizes(root, ignore_folders, ignore_exts, workers=8, respect_gitignore=False):
+    """Return {dir_path: (total_bytes, file_count, newest_mtime)} for root and every folder below it.
+
+    Each folder is listed by a task on a thread pool, so sibling subtrees
+    are scanned concurrently; this matters most on network mounts, where
+    each stat call waits on a round trip. Totals are then rolled up from the
+    deepest folders to the root. Ignored folders, files with ignored
+    extensions and symlinked folders are not counted.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    matcher = make_matcher(root, ignore_folders, ignore_exts, respect_gitignore)
+
+    def scan(path):
+        total = files = 0
+        newest = 0.0
+        subdirs = []
+        try:
+            entries = walker.scan_dir(path, matcher, rel_dir_for(path, matcher), sort=False)
+        except OSError:
+            entries = []
+        for entry in entries:
+            try:
+                if entry.is_dir:
+                    if not entry.ignored and not entry.is_symlink():
+                        subdirs.append(entry.path)
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            total += st.st_size
+            files += 1
+            newest = max(newest, st.st_mtime)
+        progress.current.advance(path, total, files=len(entries))
+        return path, total, files, newest, subdirs
+
+    totals = {}
+    parents = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(scan, root)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, total, files, newest, subdirs = future.result()
+                totals[path] = [total, files, newest]
+                for sub in subdirs:
+                    parents[sub] = path
+                    pending.add(pool.submit(scan, sub))
+
+    # A folder's path is always longer than its parent's, so longest-first
+    # visits every child before the parent it is added to
+    for path in sorted(totals, key=len, reverse=True):
+        parent = parents.get(path)
+        if parent is not None:
+            child, into = totals[path], totals[parent]
+            into[0] += child[0]
+            into[1] += child[1]
+            into[2] = max(into[2], child[2])
+
+    return {path: tuple(value) for path, value in totals.items()}
+
+def format_size(num_bytes):
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if num_bytes < 1024 or unit == "TB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+def size_note(kind, info, color=True):
+    """Describe the size of an entry given its (bytes, files, newest_mtime)."""
+    if info is None or kind not in ("dir", "file"):
+        return ""
+    total, files, newest = info
+    if kind == "file":
+        note = f"({format_size(total)})"
+    else:
+        modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(newest)) if files else "-"
+        note = f"({format_size(total)}, {files} files, newest {modified})"
+    return f" [dim]{note}[/]" if color else f" {note}"
+
+def sized_listing(path, matcher, sizes, sort_by="name"):
+    """scan_dir plus size info for each entry, optionally sorted largest first.
+
+    Returns (entries, info) where info maps entry paths to
+    (bytes, files, newest_mtime). Folder sizes come from sizes (see
+    compute_dir_sizes); file sizes come from the directory scan.
+    """
+    if sizes is None:
+        return scan_dir(path, matcher), {}
+    info = {}
+    entries = scan_dir(path, matcher, info)
+    for kind, _, entry_path in entries:
+        if kind == "dir" and entry_path in sizes:
+            info[entry_path] = sizes[entry_path]
+    if sort_by == "size":
+        entries.sort(key=lambda item: -info.get(item[2], (0,))[0])
+    return entries, info
+
+def count_entries(entries):
+    """Return (dirs, files) among listing entries; "more" and "error" entries are not counted."""
+    files = sum(1 for kind, _, _ in entries if kind == "file")
+    dirs = sum(1 for kind, _, _ in entries if kind not in ("file", "more", "error"))
+    return dirs, files
+
+def summarize_dir(path, matcher):
+    """Describe a directory that is not expanded by counting its direct children."""
     try:
-        entries = sorted(os.listdir(dir_path))
-    except PermissionError:
-        tree.add("[red][Permission Denied][/]")
+        entries = scan_dir(path, matcher)
+    except OSError:
+        return "(unreadable)"
+    dirs, files = count_entries(entries)
+    return f"({dirs} dirs, {files} files)"
+
+def scan_error_label(error, color=True):
+    if isinstance(error, PermissionError):
+        return "[red][Permission Denied][/]" if color else "[Permission Denied]"
+    return f"[red][Error: {error.strerror}][/]" if color else f"[Error: {error.strerror}]"
+
+def entry_label(kind, name, color=True):
+    """Return the display label for an entry, with or without Rich markup."""
+    if kind == "dir":
+        return f"[bold blue]{name}/[/]" if color else f"{name}/"
+    if kind == "more":
+        return f"[dim]… {name} more[/]" if color else f"… {name} more"
+    if kind == "stopped":
+        return f"[dim]… stopped: {name}[/]" if color else f"… stopped: {name}"
+    if kind == "ignored":
+        return f"[bold yellow]{name}/[/] [dim](ignored folder)[/]" if color else f"{name}/ (ignored folder)"
+    if kind == "link":
+        return f"[bold cyan]{name}/[/] [dim](symlink)[/]" if color else f"{name}/ (symlink)"
+    return name
+
+def limit_entries(entries, max_entries):
+    """Keep the first max_entries entries and collapse the rest into one "more" entry."""
+    if max_entries is None or len(entries) <= max_entries:
+        return entries
+    return entries[:max_entries] + [("more", str(len(entries) - max_entries), None)]
+
+def budget_reason(budget):
+    return "time budget reached" if budget.deadline is not None and budget.remaining != 0 else "entry budget reached"
+
+def stopped_label(budget, unshown, color=True):
+    """Label for the note left in the folder where the budget ran out, counting what it did not show."""
+    dirs, files = count_entries(unshown)
+    note = f"({dirs} dirs, {files} files not shown)"
+    return entry_label("stopped", budget_reason(budget), color) + (f" [dim]{note}[/]" if color else f" {note}")
+
+def build_tree(dir_path, tree, ignore_folders, ignore_exts, max_depth=None, max_entries=None, budget=None,
+               sizes=None, sort_by="name", respect_gitignore=False):
+    """Add the contents of dir_path to tree.
+
+    Directories are listed with the shared walker's scan_dir, so the entry
+    type comes from the directory listing instead of a stat call per entry,
+    and the walk uses an explicit stack so deep trees cannot hit the
+    recursion limit. Entries are visited in display order, as in
+    iter_tree_lines, so a budget is spent on the first folders shown.
+
+    Directories deeper than max_depth are not walked; they show a count of
+    their direct children instead. At most max_entries entries are shown per
+    directory. When the WalkBudget runs out the walk stops with a note in
+    the folder it was listing, counting the entries left out there.
+
+    With sizes from compute_dir_sizes every entry is labelled with its size
+    (and folders with their file count and newest mtime); sort_by="size"
+    lists the largest entries first. respect_gitignore also hides whatever
+    .gitignore/.ignore files exclude; those folders show as ignored.
+    """
+    matcher = make_matcher(dir_path, ignore_folders, ignore_exts, respect_gitignore)
+    if budget is None:
+        budget = WalkBudget()
+
+    def listing(path, node):
+        try:
+            entries, info = sized_listing(path, matcher, sizes, sort_by)
+        except OSError as e:
+            node.add(scan_error_label(e))
+            return [], {}
+        return limit_entries(entries, max_entries), info
+
+    # Each frame is (entries, size info, index of the next entry, tree node, depth)
+    stack = [(*listing(dir_path, tree), 0, tree, 1)]
+    while stack:
+        entries, info, i, node, depth = stack.pop()
+        if i >= len(entries):
+            continue
+        kind, name, entry_path = entries[i]
+        stack.append((entries, info, i + 1, node, depth))
+
+        if kind != "more":
+            if not budget.spend():
+                node.add(stopped_label(budget, entries[i:]))
+                return
+            progress.current.advance(entry_path, 0)
+        label = entry_label(kind, name) + size_note(kind, info.get(entry_path))
+        if kind == "dir" and max_depth is not None and depth >= max_depth:
+            # The size note already summarizes the folder, so skip the extra listing
+            if sizes is None:
+                label += f" [dim]{summarize_dir(entry_path, matcher)}[/]"
+            node.add(label)
+            continue
+        branch = node.add(label)
+        if kind == "dir":
+            stack.append((*listing(entry_path, branch), 0, branch, depth + 1))
+
+def iter_tree_lines(dir_path, ignore_folders, ignore_exts, color=False,
+                    max_depth=None, max_entries=None, budget=None, sizes=None, sort_by="name",
+                    respect_gitignore=False):
+    """Yield the lines of the tree one at a time, in display order.
+
+    Only the listings of the directories on the current path are held in
+    memory, so memory grows with depth rather than with the number of
+    entries. Lines contain Rich markup when color is set. max_depth,
+    max_entries, budget, sizes, sort_by and respect_gitignore work as in
+    build_tree.
+    """
+    matcher = make_matcher(dir_path, ignore_folders, ignore_exts, respect_gitignore)
+    if budget is None:
+        budget = WalkBudget()
+
+    def listing(path):
+        try:
+            entries, info = sized_listing(path, matcher, sizes, sort_by)
+            return limit_entries(entries, max_entries), info
+        except OSError as e:
+            return [("error", scan_error_label(e, color), None)], {}
+
+    root_label = f"[bold green]{dir_path}[/]" if color else dir_path
+    if sizes is not None:
+        root_label += size_note("dir", sizes.get(dir_path), color)
+    yield root_label
+
+    # Each frame is (entries, size info, index of the next entry, line prefix, depth)
+    stack = [(*listing(dir_path), 0, "", 1)]
+    while stack:
+        entries, info, i, prefix, depth = stack.pop()
+        if i >= len(entries):
+            continue
+        kind, name, entry_path = entries[i]
+        last = i == len(entries) - 1
+        stack.append((entries, info, i + 1, prefix, depth))
+
+        if kind not in ("more", "error"):
+            if not budget.spend():
+                yield prefix + "└── " + stopped_label(budget, entries[i:], color)
+                return
+            progress.current.advance(entry_path, 0)
+
+        line = (prefix + ("└── " if last else "├── ") + entry_label(kind, name, color)
+                + size_note(kind, info.get(entry_path), color))
+        if kind == "dir" and max_depth is not None and depth >= max_depth:
+            if sizes is None:
+                summary = summarize_dir(entry_path, matcher)
+                line += f" [dim]{summary}[/]" if color else f" {summary}"
+            yield line
+            continue
+        yield line
+        if kind == "dir":
+            stack.append((*listing(entry_path), 0, prefix + ("    " if last else "│   "), depth + 1))
+
+def iter_listing_lines(root_label, entries, color=False):
+    """Yield tree lines for entries someone else already walked.
+
+    entries is a list of (depth, kind, name) records in walk order, with
+    depth 1 for the root's children and kind as in scan_dir (or "error",
+    with the label from scan_error_label as name). This is how a caller
+    that walked the tree for its own reasons, such as toolbox_common's
+    pipeline, renders it without listing any folder again.
+    """
+    # Walking backwards, an entry is the last of its siblings unless one was
+    # already seen at the same depth since the last shallower entry
+    last = [False] * len(entries)
+    seen = set()
+    for i in range(len(entries) - 1, -1, -1):
+        depth = entries[i][0]
+        last[i] = depth not in seen
+        seen = {d for d in seen if d < depth}
+        seen.add(depth)
+
+    yield f"[bold green]{root_label}[/]" if color else root_label
+    guides = []
+    for (depth, kind, name), is_last in zip(entries, last):
+        del guides[depth - 1:]
+        yield "".join(guides) + ("└── " if is_last else "├── ") + entry_label(kind, name, color)
+        guides.append("    " if is_last else "│   ")
+
+def stream_tree(dir_path, ignore_folders, ignore_exts, color=False, **limits):
+    """Print the tree line by line as the walk reaches each entry.
+
+    limits are passed on to iter_tree_lines (max_depth, max_entries, budget,
+    sizes, sort_by, respect_gitignore).
+    """
+    if color:
+        from rich.console import Console
+        console = Console()
+        for line in iter_tree_lines(dir_path, ignore_folders, ignore_exts, color=True, **limits):
+            console.print(line, highlight=False)
         return
 
-    for entry in entries:
-        full_path = os.path.join(dir_path, entry)
+    write = sys.stdout.write
+    run = stats.current
+    try:
+        for line in iter_tree_lines(dir_path, ignore_folders, ignore_exts, **limits):
+            with run.phase("print"):
+                write(line + "\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader (e.g. head or less) went away; stop quietly and keep
+        # the interpreter from complaining when it flushes stdout at exit
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
 
-        if os.path.isdir(full_path):
-            if entry in ignore_folders:
-                tree.add(f"[bold yellow]{entry}/[/] [dim](ignored folder)[/]")
-                continue
-            branch = tree.add(f"[bold blue]{entry}/[/]")
-            build_tree(full_path, branch, ignore_folders, ignore_exts)
+def explore(dir_path, ignore_folders, ignore_exts, max_entries=None, respect_gitignore=False):
+    """Browse a tree interactively, listing a directory only when it is opened."""
+    matcher = make_matcher(dir_path, ignore_folders, ignore_exts, respect_gitignore)
+    root = os.path.abspath(dir_path)
+    current = root
+
+    while True:
+        print(f"\n{current}")
+        try:
+            entries = scan_dir(current, matcher)
+        except OSError as e:
+            print(f"  {scan_error_label(e, color=False)}")
+            entries = []
+
+        dirs = []
+        for kind, name, entry_path in limit_entries(entries, max_entries):
+            number = "    "
+            if kind == "dir":
+                dirs.append(entry_path)
+                number = f"{len(dirs):>4}"
+            print(f"{number}  {entry_label(kind, name, color=False)}")
+
+        try:
+            choice = input("\nOpen folder number, '..' to go up, 'q' to quit: ").strip()
+        except EOFError:
+            return
+        if choice == "q":
+            return
+        if choice == "..":
+            if current != root:
+                current = os.path.dirname(current)
+        elif choice.isdigit() and 1 <= int(choice) <= len(dirs):
+            current = dirs[int(choice) - 1]
         else:
-            if any(entry.endswith(ext) for ext in ignore_exts):
-                continue
-            tree.add(entry)
+            print("Unknown choice.")
+
+def count_work(dir_path, ignore_folders, ignore_exts, respect_gitignore=False):
+    """Return (entries, None): the number of files and folders under dir_path, for progress totals."""
+    matcher = make_matcher(dir_path, ignore_folders, ignore_exts, respect_gitignore)
+    return progress.prescan(dir_path, matcher, include_dirs=True, sizes=False)
+
+SNAPSHOT_VERSION = 1
+
+def open_snapshot(path, mode):
+    """Open a snapshot file as text, gzip-compressed when it ends in .gz."""
+    if path.endswith(".gz"):
+        import gzip
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def iter_snapshot_entries(dir_path, ignore_folders, ignore_exts, respect_gitignore=False):
+    """Yield (rel_path, type, size, mtime) for everything under dir_path.
+
+    type is "d" or "f". Entries come out in depth-first, name-sorted order,
+    which is the order snapshot diffs rely on.
+    """
+    for entry in walk(dir_path, make_matcher(dir_path, ignore_folders, ignore_exts, respect_gitignore)):
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        rel = entry.rel_path.replace(os.sep, "/")
+        if entry.is_dir:
+            yield rel, "d", 0, st.st_mtime_ns
+        else:
+            yield rel, "f", st.st_size, st.st_mtime_ns
+
+def save_snapshot(dir_path, snapshot_path, ignore_folders, ignore_exts, respect_gitignore=False):
+    """Write a JSON-lines snapshot of dir_path and return the number of entries.
+
+    The first line is a header object; every other line is a compact
+    [path, type, size, mtime_ns] array. Paths use "/" and are relative to
+    dir_path. A .gz suffix compresses the file.
+    """
+    count = 0
+    with open_snapshot(snapshot_path, "w") as f:
+        header = {"snapshot": SNAPSHOT_VERSION, "root": os.path.abspath(dir_path), "created": time.time()}
+        f.write(json.dumps(header) + "\n")
+        for entry in iter_snapshot_entries(dir_path, ignore_folders, ignore_exts, respect_gitignore):
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            count += 1
+            progress.current.advance(entry[0], entry[2])
+    return count
+
+def read_snapshot(snapshot_path):
+    """Yield (sort_key, rel_path, type, size, mtime_ns) from a snapshot file, in file order."""
+    with open_snapshot(snapshot_path, "r") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("snapshot") != SNAPSHOT_VERSION:
+            raise ValueError(f"{snapshot_path} is not a tree snapshot")
+        for line in f:
+            rel, kind, size, mtime = json.loads(line)
+            yield tuple(rel.split("/")), rel, kind, size, mtime
+
+def diff_snapshots(old_path, new_path):
+    """Yield (change, rel_path, old, new) for entries that differ between two snapshots.
+
+    change is "added", "removed" or "changed"; old and new are the
+    (type, size, mtime_ns) of the entry on each side, or None. Both files
+    are read as sorted streams and merged, so memory use stays flat however
+    large they are. Folders only count as changed when their type changes.
+    """
+    old_iter = read_snapshot(old_path)
+    new_iter = read_snapshot(new_path)
+    old = next(old_iter, None)
+    new = next(new_iter, None)
+
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            yield "removed", old[1], old[2:], None
+            old = next(old_iter, None)
+        elif old is None or new[0] < old[0]:
+            yield "added", new[1], None, new[2:]
+            new = next(new_iter, None)
+        else:
+            if old[2] != new[2] or (old[2] == "f" and old[3:] != new[3:]):
+                yield "changed", old[1], old[2:], new[2:]
+            old = next(old_iter, None)
+            new = next(new_iter, None)
+
+def print_snapshot_diff(old_path, new_path, color=False):
+    """Print a diff of two snapshots and return the (added, removed, changed) counts."""
+    styles = {"added": ("+", "green"), "removed": ("-", "red"), "changed": ("~", "yellow")}
+    counts = {"added": 0, "removed": 0, "changed": 0}
+
+    if color:
+        from rich.console import Console
+        from rich.markup import escape
+        console = Console()
+
+        def emit(change, text):
+            mark, style = styles[change]
+            console.print(f"[{style}]{mark} {escape(text)}[/]", highlight=False)
+    else:
+        def emit(change, text):
+            print(f"{styles[change][0]} {text}")
+
+    for change, rel, old, new in diff_snapshots(old_path, new_path):
+        counts[change] += 1
+        entry = old or new
+        text = rel + "/" if entry[0] == "d" else rel
+        if change == "changed":
+            if old[0] != new[0]:
+                text += f" (was a {'folder' if old[0] == 'd' else 'file'})"
+            elif old[1] != new[1]:
+                text += f" ({format_size(old[1])} -> {format_size(new[1])})"
+            else:
+                text += " (modified)"
+        emit(change, text)
+
+    print(f"{counts['added']} added, {counts['removed']} removed, {counts['changed']} changed")
+    return counts["added"], counts["removed"], counts["changed"]
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="📁 Pretty print a folder structure using Rich with ignore options."
     )
-    parser.add_argument("path", help="Base folder path to visualize")
+    parser.add_argument("path", nargs="?", help="Base folder path to visualize")
     parser.add_argument(
         "--ignore",
         nargs="*",
@@ -41,13 +553,133 @@ if __name__ == "__main__":
         default=[],
         help="File extensions to ignore (e.g. .log .png .ico)"
     )
+    parser.add_argument(
+        "--respect-gitignore",
+        action="store_true",
+        help="Also hide paths excluded by .gitignore and .ignore files (and .git itself)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print lines as the walk reaches them instead of building the whole tree first"
+    )
+    parser.add_argument(
+        "--color",
+        choices=["auto", "always", "never"],
+        default="auto",
+        help="Use Rich colors in --stream and --diff output (default: auto, only on a terminal)"
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        help="Only expand this many levels; deeper folders show a count of their contents"
+    )
+    parser.add_argument(
+        "--max-entries",
+        type=int,
+        help="Show at most this many entries per folder and collapse the rest"
+    )
+    parser.add_argument(
+        "--entry-budget",
+        type=int,
+        help="Stop after showing this many entries in total"
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        help="Stop walking after this many seconds"
+    )
+    parser.add_argument(
+        "--sizes",
+        action="store_true",
+        help="Show total size, file count and newest change for every folder (like du)"
+    )
+    parser.add_argument(
+        "--sort",
+        choices=["name", "size"],
+        default="name",
+        help="Order entries by name or largest size first (size implies --sizes)"
+    )
+    parser.add_argument(
+        "--size-workers",
+        type=int,
+        default=8,
+        help="Threads used to scan folders for --sizes (default: 8)"
+    )
+    parser.add_argument(
+        "--interactive",
+        action="store_true",
+        help="Browse folder by folder, listing each one only when it is opened"
+    )
+    parser.add_argument(
+        "--save-snapshot",
+        metavar="FILE",
+        help="Save a JSON-lines snapshot (path, type, size, mtime) instead of printing; .gz compresses it"
+    )
+    parser.add_argument(
+        "--diff",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+        help="Compare two saved snapshots and print added, removed and changed entries"
+    )
+    stats.add_arguments(parser)
+    progress.add_arguments(parser)
+    startup.add_arguments(parser)
 
     args = parser.parse_args()
+    if args.diff:
+        color = args.color == "always" or (args.color == "auto" and sys.stdout.isatty())
+        try:
+            print_snapshot_diff(args.diff[0], args.diff[1], color=color)
+        except (OSError, ValueError) as e:
+            print(f"[!] Error: {e}")
+        sys.exit(0)
+    if args.path is None:
+        parser.error("the following arguments are required: path")
 
-    if not os.path.isdir(args.path):
-        print("[!] Error: Provided path is not a directory")
-    else:
-        console = Console()
-        tree = Tree(f"[bold green]{args.path}[/]")
-        build_tree(args.path, tree, args.ignore, args.ignore_ext)
-        console.print(tree)
+    want_sizes = (args.sizes or args.sort == "size") and not (args.interactive or args.save_snapshot)
+    phase = "snapshot" if args.save_snapshot else "sizes" if want_sizes else "tree"
+
+    def count():
+        return count_work(args.path, args.ignore, args.ignore_ext, args.respect_gitignore)
+
+    with stats.collecting(args), progress.reporting(args, phase, count if os.path.isdir(args.path) else None):
+        limits = {
+            "max_depth": args.max_depth,
+            "max_entries": args.max_entries,
+            "budget": WalkBudget(args.entry_budget, args.time_budget),
+            "sort_by": args.sort,
+            "respect_gitignore": args.respect_gitignore,
+        }
+        if want_sizes and os.path.isdir(args.path):
+            with stats.current.phase("sizes"):
+                limits["sizes"] = compute_dir_sizes(args.path, args.ignore, args.ignore_ext,
+                                                    workers=args.size_workers,
+                                                    respect_gitignore=args.respect_gitignore)
+            progress.current.next_phase("tree")
+
+        if not os.path.isdir(args.path):
+            print("[!] Error: Provided path is not a directory")
+        elif args.save_snapshot:
+            count = save_snapshot(args.path, args.save_snapshot, args.ignore, args.ignore_ext,
+                                  respect_gitignore=args.respect_gitignore)
+            print(f"Saved {count} entries to {args.save_snapshot}")
+        elif args.interactive:
+            explore(args.path, args.ignore, args.ignore_ext, max_entries=args.max_entries,
+                    respect_gitignore=args.respect_gitignore)
+        elif args.stream or not (sys.stdout.isatty() or args.color == "always"):
+            # Piped output has no colors anyway, so write the same layout line by
+            # line instead of building a Rich tree (and importing Rich at all)
+            color = args.color == "always" or (args.color == "auto" and sys.stdout.isatty())
+            stream_tree(args.path, args.ignore, args.ignore_ext, color=color, **limits)
+        else:
+            from rich.console import Console
+            from rich.tree import Tree
+
+            console = Console()
+            root_note = size_note("dir", limits.get("sizes", {}).get(args.path))
+            tree = Tree(f"[bold green]{args.path}[/]{root_note}")
+            with stats.current.phase("build"):
+                build_tree(args.path, tree, args.ignore, args.ignore_ext, **limits)
+            with stats.current.phase("render"):
+                console.print(tree)
@@ -1,13 +1,600 @@
 import os
+import sys
+import json
+import errno
 import shutil
+import hashlib
 import argparse
+from collections import deque
 
-def copy_and_rename_files(source_dir, dest_dir, ignore_dirs=None, ignore_exts=None):
+# The shared walker lives in toolbox_common at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolbox_common import progress, startup, stats
+from toolbox_common.gitignore import make_matcher
+from toolbox_common.walker import walk
+
+# Invalid characters for Windows filenames
+INVALID_CHARS = '<>:"|?*'
+
+# Manifest written to the destination in incremental mode
+MANIFEST_NAME = ".flatten_manifest.json"
+MANIFEST_VERSION = 1
+
+# Read size used when hashing file contents
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Bytes hashed to split same-size files before a full content hash
+PARTIAL_HASH_SIZE = 64 * 1024
+
+# Mapping of duplicate outputs to their stored copy, written by dedup='mapping'
+DEDUP_MAP_NAME = ".flatten_duplicates.json"
+DEDUP_MODES = ['hardlink', 'mapping']
+
+# Archive suffixes recognised in the destination and the format they select
+ARCHIVE_SUFFIXES = {
+    '.tar': 'tar',
+    '.tar.gz': 'gz',
+    '.tgz': 'gz',
+    '.tar.bz2': 'bz2',
+    '.tar.xz': 'xz',
+    '.tar.zst': 'zst',
+    '.zip': 'zip',
+}
+ARCHIVE_FORMATS = ['tar', 'gz', 'bz2', 'xz', 'zst', 'zip']
+
+# Chunk size used to stream file data into an archive
+ARCHIVE_CHUNK_SIZE = 1024 * 1024
+
+# How each file is placed in the destination
+LINK_MODES = ['copy', 'hardlink', 'symlink', 'reflink', 'auto']
+
+# Linux ioctl that clones a file's extents on copy-on-write filesystems (btrfs, xfs)
+FICLONE = 0x40049409
+
+def short_hash(text):
+    """Return a short, stable hex hash of text used to disambiguate names."""
+    return hashlib.blake2b(text.encode('utf-8', 'surrogateescape'), digest_size=4).hexdigest()
+
+def add_name_suffix(name, suffix):
+    """Insert _suffix before the extension of name."""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}_{suffix}{ext}"
+
+def make_flat_name(source_dir, dest_dir, rel_path, file):
+    """Build the flattened destination path for a file found under rel_path.
+
+    Returns (dest_file, truncated). Names that would be too long are cut
+    down and given a hash of the full name, so two long paths sharing a
+    prefix still get different names.
+    """
+    # Create the new filename
+    if rel_path == ".":
+        new_name = f"{os.path.basename(source_dir)}_{file}"
+    else:
+        new_name = f"{os.path.basename(source_dir)}/{rel_path}_{file}"
+
+    # Replace directory separators and invalid characters in the new filename
+    new_name = new_name.replace(os.sep, "_").replace("/", "_")
+    # Remove or replace problematic characters for Windows
+    for char in INVALID_CHARS:
+        new_name = new_name.replace(char, "_")
+
+    # Create the destination file path
+    dest_file = os.path.join(dest_dir, new_name)
+
+    # Ensure the filename isn't too long (Windows limit is ~260 chars)
+    truncated = False
+    if len(dest_file) > 250:
+        name, ext = os.path.splitext(new_name)
+        # Truncate the name but keep the extension and a hash of the full name
+        suffix = short_hash(new_name)
+        max_name_len = 250 - len(dest_dir) - len(ext) - 10 - len(suffix) - 1  # buffer
+        if max_name_len > 0:
+            new_name = f"{name[:max_name_len]}_{suffix}{ext}"
+            dest_file = os.path.join(dest_dir, new_name)
+            truncated = True
+
+    return dest_file, truncated
+
+def make_namer(source_dir, dest_dir, names=None, taken=None):
+    """Return a function that gives each file under source_dir its flattened name.
+
+    The function takes the file's path relative to source_dir (os.sep
+    separators) and returns (rel_file, dest_file), where rel_file uses '/'
+    separators. Call it in walk order so names are the same on every run.
+
+    Flattened names are tracked in memory, compared case-insensitively so
+    the output is safe on Windows and macOS. A name that was already given
+    out (e.g. a/b_c.txt and a_b/c.txt) gets a hash of its relative path
+    appended. If names is a dict, names["collisions"] and
+    names["truncated"] are filled with (rel_file, name) pairs.
+
+    taken, if given, is the set of casefolded names already handed out. It
+    is updated in place, so a caller that deletes an output can discard its
+    name to let it be used again.
+    """
+    if names is None:
+        names = {}
+    collisions = names.setdefault("collisions", [])
+    truncations = names.setdefault("truncated", [])
+    emitted = set() if taken is None else taken
+
+    def flat_name(rel_path):
+        # Get the relative path of the containing directory
+        rel_dir = os.path.dirname(rel_path) or "."
+        file = os.path.basename(rel_path)
+
+        rel_file = rel_path.replace(os.sep, "/")
+        dest_file, truncated = make_flat_name(source_dir, dest_dir, rel_dir, file)
+        name = os.path.basename(dest_file)
+        if truncated:
+            truncations.append((rel_file, name))
+
+        if name.casefold() in emitted:
+            candidate = add_name_suffix(name, short_hash(rel_file))
+            counter = 1
+            while candidate.casefold() in emitted:
+                candidate = add_name_suffix(name, f"{short_hash(rel_file)}_{counter}")
+                counter += 1
+            name = candidate
+            dest_file = os.path.join(dest_dir, name)
+            collisions.append((rel_file, name))
+        emitted.add(name.casefold())
+        return rel_file, dest_file
+
+    return flat_name
+
+def iter_copy_jobs(source_dir, dest_dir, ignore_dirs, ignore_exts, names=None, respect_gitignore=False):
+    """Walk source_dir and yield (rel_file, src_file, dest_file, entry) in walk order.
+
+    rel_file is the path relative to source_dir using '/' separators and
+    entry is the WalkEntry from the shared walker, which caches its stat.
+    Directories and files are visited in sorted order so names are the same
+    on every run. Names come from make_namer, which fills names with the
+    collisions and truncations it resolved.
+
+    With respect_gitignore, paths excluded by .gitignore/.ignore files are
+    skipped too (see toolbox_common.gitignore).
+    """
+    flat_name = make_namer(source_dir, dest_dir, names)
+
+    # Ignored folders are pruned and ignored extensions dropped by the walker
+    matcher = make_matcher(source_dir, ignore_dirs, ignore_exts, respect_gitignore)
+
+    for entry in walk(source_dir, matcher):
+        if entry.is_dir:
+            continue
+        rel_file, dest_file = flat_name(entry.rel_path)
+        yield rel_file, entry.path, dest_file, entry
+
+def count_work(source_dir, ignore_dirs, ignore_exts, respect_gitignore=False):
+    """Return the (files, bytes) a flatten of source_dir will process, for progress totals."""
+    source_dir = os.path.abspath(source_dir)
+    return progress.prescan(source_dir, make_matcher(source_dir, ignore_dirs, ignore_exts, respect_gitignore))
+
+def hash_file(path, limit=None):
+    """Return the hex content hash of a file, read in fixed-size chunks.
+
+    With limit only the first limit bytes are hashed.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with stats.current.phase("hash"), open(path, 'rb') as f:
+        if limit is not None:
+            digest.update(f.read(limit))
+        else:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        size = f.tell()
+    stats.current.count("files_read")
+    stats.current.count("bytes_read", size)
+    return digest.hexdigest()
+
+def group_by(items, key):
+    """Group items by key(item), dropping items whose key raises OSError."""
+    groups = {}
+    for item in items:
+        try:
+            groups.setdefault(key(item), []).append(item)
+        except OSError:
+            pass
+    return groups
+
+def find_duplicates(jobs):
+    """Split copy jobs into unique files and byte-identical duplicates.
+
+    Files are grouped by size first, then by a hash of their first
+    PARTIAL_HASH_SIZE bytes, and only files still sharing a group get a full
+    content hash. The first file of each content (in walk order) is the one
+    that gets stored.
+
+    Returns (unique_jobs, duplicates) where duplicates is a list of
+    (job, canonical_dest_file, digest, size). Files that cannot be read are
+    left in unique_jobs so the copy reports the error.
+    """
+    sizes = {}
+    for job in jobs:
+        try:
+            sizes[job[1]] = os.path.getsize(job[1])
+        except OSError:
+            pass
+
+    duplicate_of = {}
+    by_size = group_by([job for job in jobs if job[1] in sizes], lambda job: sizes[job[1]])
+    for size, same_size in by_size.items():
+        if len(same_size) < 2:
+            continue
+        # The partial hash covers small files entirely, so it is their content hash
+        by_content = {}
+        for head, same_head in group_by(same_size, lambda job: hash_file(job[1], PARTIAL_HASH_SIZE)).items():
+            if len(same_head) < 2:
+                continue
+            if size <= PARTIAL_HASH_SIZE:
+                by_content[head] = same_head
+            else:
+                by_content.update(group_by(same_head, lambda job: hash_file(job[1])))
+        for digest, group in by_content.items():
+            for job in group[1:]:
+                duplicate_of[job[1]] = (group[0][2], digest, size)
+
+    unique_jobs = []
+    duplicates = []
+    for job in jobs:
+        if job[1] in duplicate_of:
+            duplicates.append((job,) + duplicate_of[job[1]])
+        else:
+            unique_jobs.append(job)
+    return unique_jobs, duplicates
+
+def load_manifest(dest_dir):
+    """Load the incremental manifest from dest_dir, or return an empty one."""
+    manifest_path = os.path.join(dest_dir, MANIFEST_NAME)
+    try:
+        with stats.current.phase("manifest"), open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring unreadable manifest {manifest_path}: {e}")
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        print(f"Warning: ignoring manifest with unknown version: {manifest_path}")
+        return {}
+    return data.get("files", {})
+
+def save_manifest(dest_dir, files):
+    """Atomically write the incremental manifest to dest_dir."""
+    manifest_path = os.path.join(dest_dir, MANIFEST_NAME)
+    tmp_path = manifest_path + ".tmp"
+    with stats.current.phase("manifest"):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "files": files}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+
+def is_unchanged(old, entry, src_file, use_hash):
+    """Check whether a file recorded in the manifest still matches the source.
+
+    Size and mtime_ns decide on their own. With use_hash a file whose mtime
+    moved but whose content hash is the same also counts as unchanged.
+    """
+    if not old or old.get("name") != entry["name"] or old.get("size") != entry["size"]:
+        return False
+    if old.get("mtime_ns") == entry["mtime_ns"]:
+        if "hash" in old:
+            entry["hash"] = old["hash"]
+        return True
+    if use_hash and "hash" in old:
+        entry["hash"] = hash_file(src_file)
+        return entry["hash"] == old["hash"]
+    return False
+
+def remove_existing(dest_file):
+    """Remove dest_file if present so a new file or link can take its place."""
+    try:
+        os.remove(dest_file)
+    except FileNotFoundError:
+        pass
+
+def clone_file(src_file, dest_file):
+    """Clone src_file into dest_file with the FICLONE ioctl, sharing its data blocks.
+
+    Raises OSError when the file system cannot clone (ext4, tmpfs, across
+    devices) or the platform has no FICLONE; dest_file is then left absent.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "FICLONE is not available on this platform")
+
+    remove_existing(dest_file)
+    try:
+        with open(src_file, 'rb') as src, open(dest_file, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        remove_existing(dest_file)
+        raise
+    shutil.copystat(src_file, dest_file)
+
+def kernel_copy_file(src_file, dest_file):
+    """Copy src_file into dest_file with os.copy_file_range.
+
+    The kernel copies the data without passing it through user space, and
+    may share or offload it on file systems that support that. Raises
+    OSError when copy_file_range is not available for this pair of files.
+    """
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError(errno.EOPNOTSUPP, "copy_file_range is not available on this platform")
+
+    remove_existing(dest_file)
+    try:
+        with open(src_file, 'rb') as src, open(dest_file, 'wb') as dst:
+            remaining = os.fstat(src.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+    except OSError:
+        remove_existing(dest_file)
+        raise
+    shutil.copystat(src_file, dest_file)
+
+def reflink_file(src_file, dest_file):
+    """Clone src_file into dest_file, or let the kernel copy it where cloning is not supported.
+
+    Raises OSError when neither FICLONE nor os.copy_file_range works for
+    this pair of files.
+    """
+    try:
+        clone_file(src_file, dest_file)
+    except OSError:
+        kernel_copy_file(src_file, dest_file)
+
+def copy_file_data(src_file, dest_file):
+    """shutil.copy2 into a fresh file.
+
+    An earlier hardlink or symlink run leaves dest_file pointing at the
+    source itself; copying through it would fail, or truncate the source.
+    """
+    remove_existing(dest_file)
+    return shutil.copy2(src_file, dest_file)
+
+def hardlink_file(src_file, dest_file):
+    remove_existing(dest_file)
+    os.link(src_file, dest_file)
+
+def symlink_file(src_file, dest_file):
+    remove_existing(dest_file)
+    os.symlink(src_file, dest_file)
+
+PLACE_FUNCTIONS = {
+    'copy': copy_file_data,
+    'hardlink': hardlink_file,
+    'symlink': symlink_file,
+    'reflink': reflink_file,
+}
+
+def fallback_copy(src_file, dest_file):
+    """Copy the data for link_mode='auto': in the kernel if possible, else with shutil.copy2."""
+    try:
+        kernel_copy_file(src_file, dest_file)
+    except OSError:
+        copy_file_data(src_file, dest_file)
+
+# Strategies tried in order by link_mode='auto'; a copy is the last resort.
+# Only a real clone counts as reflink here, so on file systems that cannot
+# clone (such as ext4) the outputs become hard links rather than copies.
+AUTO_ORDER = ['reflink', 'hardlink', 'copy']
+
+AUTO_FUNCTIONS = {
+    'reflink': clone_file,
+    'hardlink': hardlink_file,
+}
+
+def make_placer(link_mode):
+    """Return a function (src_file, dest_file) that writes one output file.
+
+    For link_mode='auto' every strategy in AUTO_ORDER is tried per file.
+    A strategy that fails is not retried for the rest of the run, so a
+    cross-device destination costs one failed link instead of one per file.
+    """
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"Unknown link mode: {link_mode}")
+    if link_mode != 'auto':
+        return PLACE_FUNCTIONS[link_mode]
+
+    disabled = set()
+
+    def place(src_file, dest_file):
+        for mode in AUTO_ORDER:
+            if mode in disabled:
+                continue
+            if mode == 'copy':
+                return fallback_copy(src_file, dest_file)
+            try:
+                return AUTO_FUNCTIONS[mode](src_file, dest_file)
+            except OSError:
+                disabled.add(mode)
+
+    return place
+
+def copy_file(src_file, dest_file, entry=None, use_hash=False, place=copy_file_data):
+    """Copy a single file. Returns None on success or the error on failure.
+
+    place performs the actual write (see make_placer). When use_hash is set
+    the content hash is stored in entry["hash"].
+    """
+    run = stats.current
+    try:
+        with run.track_file(src_file, "copy"):
+            place(src_file, dest_file)
+        if run.enabled:
+            run.count("files_written")
+            run.count("bytes_written", os.lstat(dest_file).st_size)
+        if use_hash and "hash" not in entry:
+            entry["hash"] = hash_file(src_file)
+    except Exception as e:
+        return e
+    return None
+
+def get_archive_format(destination, archive_format=None):
+    """Return the archive format for destination, or None for a directory.
+
+    '-' means stdout and defaults to an uncompressed tar stream.
+    """
+    if archive_format:
+        return archive_format
+    if destination == '-':
+        return 'tar'
+    lower = destination.lower()
+    for suffix, fmt in ARCHIVE_SUFFIXES.items():
+        if lower.endswith(suffix):
+            return fmt
+    return None
+
+def archive_and_rename_files(source_dir, archive_path, ignore_dirs=None, ignore_exts=None,
+                             archive_format=None, fileobj=None, respect_gitignore=False):
+    """
+    Stream files from source_dir into a tar or zip archive, using the same
+    flattened names copy_and_rename_files would give them.
+
+    archive_path may be '-' together with fileobj (e.g. sys.stdout.buffer)
+    to write to a stream. File data is copied in ARCHIVE_CHUNK_SIZE chunks,
+    so memory use does not depend on file size. 'zst' needs the optional
+    zstandard package.
+
+    Returns a dict with the number of archived ("copied") and failed files
+    and the renamed "collisions" and "truncated" names.
+    """
+    if ignore_dirs is None:
+        ignore_dirs = []
+    if ignore_exts is None:
+        ignore_exts = []
+
+    source_dir = os.path.abspath(source_dir)
+    archive_format = get_archive_format(archive_path, archive_format)
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format: {archive_format}")
+
+    # Names are computed as if flattening next to the archive
+    if fileobj is None:
+        archive_path = os.path.abspath(archive_path)
+        dest_dir = os.path.dirname(archive_path)
+    else:
+        dest_dir = os.getcwd()
+
+    import tarfile
+    import zipfile
+    if archive_format == 'zst':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("writing .tar.zst requires the 'zstandard' package (pip install zstandard)")
+
+    summary = {"copied": 0, "failed": 0, "collisions": [], "truncated": []}
+
+    def report(src_file, name, error, size=None):
+        progress.current.advance(src_file, size)
+        with stats.current.phase("print"):
+            if error is None:
+                summary["copied"] += 1
+                if not progress.current.enabled:
+                    print(f"Archived: {src_file} -> {name}")
+            else:
+                summary["failed"] += 1
+                print(f"Error archiving {src_file}: {error}")
+
+    jobs = iter_copy_jobs(source_dir, dest_dir, ignore_dirs, ignore_exts, summary, respect_gitignore)
+
+    raw = fileobj
+    compressor = None
+    try:
+        if raw is None:
+            raw = open(archive_path, 'wb')
+
+        if archive_format == 'zip':
+            with zipfile.ZipFile(raw, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+                for _, src_file, dest_file, _ in jobs:
+                    name = os.path.basename(dest_file)
+                    try:
+                        with stats.current.track_file(src_file, "archive"):
+                            info = zipfile.ZipInfo.from_file(src_file, name)
+                            info.compress_type = zipfile.ZIP_DEFLATED
+                            with open(src_file, 'rb') as src, zf.open(info, 'w', force_zip64=True) as dst:
+                                shutil.copyfileobj(src, dst, ARCHIVE_CHUNK_SIZE)
+                        stats.current.count("files_read")
+                        stats.current.count("bytes_read", info.file_size)
+                    except Exception as e:
+                        report(src_file, name, e)
+                        continue
+                    report(src_file, name, None, info.file_size)
+            return summary
+
+        if archive_format == 'zst':
+            compressor = zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+            mode = 'w|'
+            stream = compressor
+        else:
+            mode = 'w|' if archive_format == 'tar' else f'w|{archive_format}'
+            stream = raw
+
+        # Pipe mode ('w|') never seeks, so the same code writes files and stdout
+        with tarfile.open(fileobj=stream, mode=mode, bufsize=ARCHIVE_CHUNK_SIZE) as tar:
+            for _, src_file, dest_file, _ in jobs:
+                name = os.path.basename(dest_file)
+                try:
+                    with stats.current.track_file(src_file, "archive"), open(src_file, 'rb') as src:
+                        info = tar.gettarinfo(arcname=name, fileobj=src)
+                        tar.addfile(info, src)
+                    stats.current.count("files_read")
+                    stats.current.count("bytes_read", info.size)
+                except Exception as e:
+                    report(src_file, name, e)
+                    continue
+                report(src_file, name, None, info.size)
+    finally:
+        if compressor is not None:
+            compressor.close()
+        if raw is not None and fileobj is None:
+            raw.close()
+
+    return summary
+
+def copy_and_rename_files(source_dir, dest_dir, ignore_dirs=None, ignore_exts=None, workers=1,
+                          incremental=False, use_hash=False, delete_orphans=False, link_mode='copy',
+                          dedup=None, respect_gitignore=False):
     """
     Recursively copy files from source_dir to dest_dir, 
     renaming them with their path relative to source_dir.
-    Skips folders listed in ignore_dirs and files with extensions in ignore_exts.
+    Skips folders listed in ignore_dirs and files with extensions in ignore_exts,
+    and with respect_gitignore also whatever .gitignore/.ignore files exclude.
+
+    With workers > 1 the walk keeps running on the calling thread while a
+    bounded pool of threads performs the copies. Results are still reported
+    in walk order, so the output is the same as a serial run.
+
+    With incremental=True a manifest in dest_dir records the size and
+    mtime_ns (and with use_hash a content hash) of every copied file, and
+    later runs only copy files that are new or changed. delete_orphans
+    removes outputs whose source file no longer exists.
+
+    link_mode picks how outputs are written: 'copy' (default), 'hardlink',
+    'symlink', 'reflink' (copy-on-write clone), or 'auto', which tries a
+    reflink, then a hard link, and falls back to a copy per file.
+
+    dedup stores one physical copy per unique content (see find_duplicates).
+    With dedup='hardlink' duplicates become hard links to that copy; with
+    dedup='mapping' they are not written at all and are listed in
+    DEDUP_MAP_NAME instead. The walk is collected in memory before copying.
+
+    Returns a dict with the number of copied, skipped, failed, deleted and
+    deduplicated files, the bytes saved by deduplication, and the renamed
+    "collisions" and "truncated" names (see iter_copy_jobs).
     """
+    if dedup is not None and dedup not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode: {dedup}")
+    if dedup == 'mapping' and incremental:
+        raise ValueError("dedup='mapping' cannot be combined with incremental mode")
+
     if ignore_dirs is None:
         ignore_dirs = []
     if ignore_exts is None:
@@ -17,8 +604,9 @@ def copy_and_rename_files(source_dir, dest_dir, ignore_dirs=None, ignore_exts=No
     source_dir = os.path.abspath(source_dir)
     dest_dir = os.path.abspath(dest_dir)
 
-    # Normalize extensions (ensure they start with a dot)
-    ignore_exts = [ext if ext.startswith('.') else f'.{ext}' for ext in ignore_exts]
+    summary = {"copied": 0, "skipped": 0, "failed": 0, "deleted": 0,
+               "deduplicated": 0, "bytes_saved": 0, "collisions": [], "truncated": []}
+    place = make_placer(link_mode)
 
     # Create destination directory if it doesn't exist
     try:
@@ -27,64 +615,211 @@ def copy_and_rename_files(source_dir, dest_dir, ignore_dirs=None, ignore_exts=No
             print(f"Created destination directory: {dest_dir}")
     except Exception as e:
         print(f"Error creating destination directory: {e}")
-        return
+        return summary
 
-    # Walk through the source directory
-    for root, dirs, files in os.walk(source_dir):
-        # Modify dirs in-place to skip ignored directories
-        dirs[:] = [d for d in dirs if d not in ignore_dirs]
+    old_manifest = load_manifest(dest_dir) if incremental else {}
+    new_manifest = {}
+    failed_dests = set()
 
-        # Get the relative path from source directory
-        rel_path = os.path.relpath(root, source_dir)
+    def report(rel_file, src_file, dest_file, entry, error):
+        progress.current.advance(src_file, entry["size"] if entry else None)
+        if error is None:
+            summary["copied"] += 1
+            if incremental:
+                new_manifest[rel_file] = entry
+            if not progress.current.enabled:
+                with stats.current.phase("print"):
+                    print(f"Copied: {src_file} -> {dest_file}")
+        else:
+            summary["failed"] += 1
+            failed_dests.add(dest_file)
+            # Keep the previous record so the old output is not treated as an orphan
+            if rel_file in old_manifest:
+                new_manifest[rel_file] = old_manifest[rel_file]
+            print(f"Error copying {src_file}: {error}")
 
-        for file in files:
-            # Skip file if it has an ignored extension
-            if os.path.splitext(file)[1].lower() in ignore_exts:
+    def iter_changed(jobs):
+        """Drop files the manifest says are unchanged; attach manifest entries."""
+        for rel_file, src_file, dest_file, walk_entry in jobs:
+            if not incremental:
+                yield rel_file, src_file, dest_file, None
+                continue
+            try:
+                st = walk_entry.stat()
+            except OSError as e:
+                report(rel_file, src_file, dest_file, None, e)
+                continue
+            entry = {"name": os.path.basename(dest_file), "size": st.st_size,
+                     "mtime_ns": st.st_mtime_ns}
+            try:
+                unchanged = is_unchanged(old_manifest.get(rel_file), entry, src_file, use_hash)
+            except OSError as e:
+                report(rel_file, src_file, dest_file, None, e)
                 continue
+            if unchanged:
+                summary["skipped"] += 1
+                new_manifest[rel_file] = entry
+                progress.current.advance(src_file, st.st_size)
+                continue
+            yield rel_file, src_file, dest_file, entry
 
-            src_file = os.path.join(root, file)
+    jobs = iter_changed(iter_copy_jobs(source_dir, dest_dir, ignore_dirs, ignore_exts, summary,
+                                        respect_gitignore))
+    duplicates = []
+    if dedup:
+        jobs, duplicates = find_duplicates(list(jobs))
 
-            # Create the new filename
-            if rel_path == ".":
-                new_name = f"{os.path.basename(source_dir)}_{file}"
-            else:
-                new_name = f"{os.path.basename(source_dir)}/{rel_path}_{file}"
+    if workers <= 1:
+        for rel_file, src_file, dest_file, entry in jobs:
+            report(rel_file, src_file, dest_file, entry,
+                   copy_file(src_file, dest_file, entry, use_hash and incremental, place))
+    else:
+        from concurrent.futures import ThreadPoolExecutor
 
-            # Replace directory separators and invalid characters in the new filename
-            new_name = new_name.replace(os.sep, "_").replace("/", "_")
-            # Remove or replace problematic characters for Windows
-            invalid_chars = '<>:"|?*'
-            for char in invalid_chars:
-                new_name = new_name.replace(char, "_")
+        # Keep a bounded window of in-flight copies and drain it oldest-first so
+        # memory stays flat and per-file lines come out in walk order.
+        max_pending = workers * 4
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for rel_file, src_file, dest_file, entry in jobs:
+                future = pool.submit(copy_file, src_file, dest_file, entry, use_hash and incremental, place)
+                pending.append((rel_file, src_file, dest_file, entry, future))
+                if len(pending) >= max_pending:
+                    *job, future = pending.popleft()
+                    report(*job, future.result())
+            while pending:
+                *job, future = pending.popleft()
+                report(*job, future.result())
 
-            # Create the destination file path
-            dest_file = os.path.join(dest_dir, new_name)
+    # Duplicates are placed after every stored copy has been written
+    dedup_map = {}
+    for (rel_file, src_file, dest_file, entry), canonical_dest, digest, size in duplicates:
+        if canonical_dest in failed_dests:
+            report(rel_file, src_file, dest_file, entry,
+                   copy_file(src_file, dest_file, entry, use_hash and incremental, place))
+            continue
+        if dedup == 'mapping':
+            dedup_map[os.path.basename(dest_file)] = os.path.basename(canonical_dest)
+        else:
+            try:
+                remove_existing(dest_file)
+                os.link(canonical_dest, dest_file)
+            except OSError:
+                # Hard links are not available here; store a normal copy instead
+                report(rel_file, src_file, dest_file, entry,
+                       copy_file(src_file, dest_file, entry, use_hash and incremental, place))
+                continue
+        summary["deduplicated"] += 1
+        summary["bytes_saved"] += size
+        if incremental:
+            if use_hash:
+                entry["hash"] = digest
+            new_manifest[rel_file] = entry
+        progress.current.advance(src_file, size)
+        if not progress.current.enabled:
+            print(f"Deduplicated: {src_file} -> {dest_file} (same as {os.path.basename(canonical_dest)})")
 
-            # Ensure the filename isn't too long (Windows limit is ~260 chars)
-            if len(dest_file) > 250:
-                name, ext = os.path.splitext(new_name)
-                # Truncate the name but keep the extension
-                max_name_len = 250 - len(dest_dir) - len(ext) - 10  # buffer
-                if max_name_len > 0:
-                    new_name = name[:max_name_len] + ext
-                    dest_file = os.path.join(dest_dir, new_name)
+    if dedup == 'mapping':
+        try:
+            with open(os.path.join(dest_dir, DEDUP_MAP_NAME), 'w', encoding='utf-8') as f:
+                json.dump(dedup_map, f, indent=1, sort_keys=True)
+        except Exception as e:
+            print(f"Error writing duplicate mapping: {e}")
 
-            # Copy the file with the new name
+    if incremental:
+        live_names = {entry["name"] for entry in new_manifest.values()}
+        for rel_file in sorted(set(old_manifest) - set(new_manifest)):
+            old = old_manifest[rel_file]
+            if not delete_orphans:
+                new_manifest[rel_file] = old
+                continue
+            if old["name"] in live_names:
+                continue
+            orphan = os.path.join(dest_dir, old["name"])
             try:
-                shutil.copy2(src_file, dest_file)
-                print(f"Copied: {src_file} -> {dest_file}")
+                os.remove(orphan)
+                summary["deleted"] += 1
+                print(f"Deleted orphan: {orphan}")
+            except FileNotFoundError:
+                pass
             except Exception as e:
-                print(f"Error copying {src_file}: {e}")
-                continue
+                new_manifest[rel_file] = old
+                print(f"Error deleting {orphan}: {e}")
+        try:
+            save_manifest(dest_dir, new_manifest)
+        except Exception as e:
+            print(f"Error writing manifest: {e}")
+
+    return summary
+
+def print_name_report(summary):
+    """Print every flattened name that had to be disambiguated or shortened."""
+    if summary["collisions"]:
+        print(f"Name collisions resolved: {len(summary['collisions'])}")
+        for rel_file, name in summary["collisions"]:
+            print(f"  {rel_file} -> {name}")
+    if summary["truncated"]:
+        print(f"Truncated names: {len(summary['truncated'])}")
+        for rel_file, name in summary["truncated"]:
+            print(f"  {rel_file} -> {name}")
+
+def print_archive_summary(summary):
+    print("-" * 50)
+    print(f"Archived {summary['copied']} file(s), {summary['failed']} error(s).")
+    print_name_report(summary)
+    print("Archive operation completed successfully.")
+
+def print_copy_summary(summary, incremental=False, dedup=None):
+    print("-" * 50)
+    print(f"Copied {summary['copied']} file(s), {summary['failed']} error(s).")
+    if incremental:
+        print(f"Unchanged: {summary['skipped']}, deleted orphans: {summary['deleted']}.")
+    if dedup:
+        print(f"Deduplicated {summary['deduplicated']} file(s), saved {summary['bytes_saved']:,} bytes.")
+    print_name_report(summary)
+    print("Copy operation completed successfully.")
 
 def main():
     parser = argparse.ArgumentParser(description='Recursively copy files with path-based renaming.')
     parser.add_argument('source', help='Source directory')
-    parser.add_argument('destination', help='Destination directory')
+    parser.add_argument('destination',
+                        help='Destination directory, or an archive (.tar, .tar.gz, .tar.xz, .tar.bz2, '
+                             '.tar.zst, .zip), or - for a tar stream on stdout')
     parser.add_argument('--ignore', nargs='*', default=[], help='Folder name(s) to ignore')
     parser.add_argument('--ignore-ext', nargs='*', default=[], help='File extension(s) to ignore (e.g., .png .ico)')
+    parser.add_argument('--respect-gitignore', action='store_true',
+                        help='Also skip paths excluded by .gitignore and .ignore files')
+    parser.add_argument('--archive-format', choices=ARCHIVE_FORMATS,
+                        help='Archive format to write, overriding the destination suffix')
+    parser.add_argument('--workers', type=int, default=1, help='Number of parallel copy threads (default: 1)')
+    parser.add_argument('--link-mode', choices=LINK_MODES, default='copy',
+                        help='How to write outputs: copy, hardlink, symlink, reflink, or auto (default: copy)')
+    parser.add_argument('--dedup', choices=DEDUP_MODES,
+                        help='Store one copy per unique content; duplicates become hard links '
+                             f'or entries in {DEDUP_MAP_NAME}')
+    parser.add_argument('--incremental', action='store_true',
+                        help=f'Only copy new or changed files, tracked in {MANIFEST_NAME} in the destination')
+    parser.add_argument('--hash', action='store_true',
+                        help='With --incremental, also compare content hashes when mtimes differ')
+    parser.add_argument('--delete-orphans', action='store_true',
+                        help='With --incremental, delete outputs whose source file is gone')
+    stats.add_arguments(parser)
+    progress.add_arguments(parser)
+    startup.add_arguments(parser)
 
     args = parser.parse_args()
+    if args.dedup == 'mapping' and args.incremental:
+        parser.error("--dedup mapping cannot be combined with --incremental")
+
+    archive_format = get_archive_format(args.destination, args.archive_format)
+    if archive_format and (args.incremental or args.dedup or args.link_mode != 'copy' or args.workers > 1):
+        parser.error("archive output cannot be combined with --incremental, --dedup, --link-mode or --workers")
+
+    # When the archive goes to stdout, send all progress output to stderr
+    archive_stream = None
+    if args.destination == '-':
+        archive_stream = sys.stdout.buffer
+        sys.stdout = sys.stderr
 
     # Validate source directory
     if not os.path.exists(args.source):
@@ -96,16 +831,48 @@ def main():
         return
 
     print(f"Source: {os.path.abspath(args.source)}")
-    print(f"Destination: {os.path.abspath(args.destination)}")
+    if archive_stream is not None:
+        print(f"Destination: stdout ({archive_format} archive)")
+    elif archive_format:
+        print(f"Destination: {os.path.abspath(args.destination)} ({archive_format} archive)")
+    else:
+        print(f"Destination: {os.path.abspath(args.destination)}")
     print(f"Ignoring folders: {args.ignore}")
     print(f"Ignoring extensions: {args.ignore_ext}")
+    if args.respect_gitignore:
+        print("Respecting .gitignore: yes")
+    print(f"Workers: {args.workers}")
+    print(f"Link mode: {args.link_mode}")
+    if args.dedup:
+        print(f"Deduplication: {args.dedup}")
+    if args.incremental:
+        print(f"Incremental: yes (hash: {'yes' if args.hash else 'no'}, "
+              f"delete orphans: {'yes' if args.delete_orphans else 'no'})")
     print("-" * 50)
 
+    def count():
+        return count_work(args.source, args.ignore, args.ignore_ext, args.respect_gitignore)
+
+    if archive_format:
+        try:
+            with stats.collecting(args), progress.reporting(args, "archive", count):
+                summary = archive_and_rename_files(args.source, args.destination, args.ignore, args.ignore_ext,
+                                                   archive_format=archive_format, fileobj=archive_stream,
+                                                   respect_gitignore=args.respect_gitignore)
+        except Exception as e:
+            print(f"Error writing archive: {e}")
+            return
+        print_archive_summary(summary)
+        return
+
     # Call the copy function
-    copy_and_rename_files(args.source, args.destination, args.ignore, args.ignore_ext)
-    print("-" * 50)
-    print("Copy operation completed successfully.")
+    with stats.collecting(args), progress.reporting(args, "copy", count):
+        summary = copy_and_rename_files(args.source, args.destination, args.ignore, args.ignore_ext,
+                                        workers=args.workers, incremental=args.incremental,
+                                        use_hash=args.hash, delete_orphans=args.delete_orphans,
+                                        link_mode=args.link_mode, dedup=args.dedup,
+                                        respect_gitignore=args.respect_gitignore)
+    print_copy_summary(summary, incremental=args.incremental, dedup=args.dedup)
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,103 @@
+import os
+import sys
+import argparse
+
+# The shared pipeline lives in toolbox_common at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolbox_common import progress, startup, stats
+from toolbox_common.pipeline import AnnotateStage, FlattenStage, Pipeline, TreeStage, tool
+
+LINK_MODES = ['copy', 'hardlink', 'symlink', 'reflink', 'auto']
+
+def build_stages(args):
+    """Return the stages the command line asks for, in the order they run."""
+    stages = []
+    if args.annotate:
+        stages.append(AnnotateStage(args.extensions))
+    if args.flatten:
+        stages.append(FlattenStage(args.flatten, args.link_mode))
+    if args.tree:
+        stages.append(TreeStage(args.tree))
+    return stages
+
+def print_summary(summaries):
+    print("-" * 50)
+    if "annotate" in summaries:
+        summary = summaries["annotate"]
+        print(f"Annotated {summary['annotated']} file(s), {summary['failed']} error(s).")
+    if "flatten" in summaries:
+        summary = summaries["flatten"]
+        print(f"Copied {summary['copied']} file(s), {summary['failed']} error(s).")
+        tool("flatten").print_name_report(summary)
+    if "tree" in summaries and summaries["tree"]["output"] != "-":
+        summary = summaries["tree"]
+        print(f"Wrote a tree of {summary['entries']} entries to {summary['output']}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Annotate, flatten and list a folder in a single walk.')
+    parser.add_argument('source', help='Source directory')
+    parser.add_argument('--annotate', action='store_true',
+                        help='Add or update the path comment of supported files, in place')
+    parser.add_argument('--extensions', nargs='*',
+                        help='With --annotate, file extensions to annotate (default: the annotator\'s list)')
+    parser.add_argument('--languages', metavar='CONFIG',
+                        help='With --annotate, JSON file with extra comment styles')
+    parser.add_argument('--flatten', metavar='DEST',
+                        help='Copy every file into DEST with its path in its name')
+    parser.add_argument('--link-mode', choices=LINK_MODES, default='copy',
+                        help='With --flatten, how outputs are written (default: copy)')
+    parser.add_argument('--tree', metavar='FILE',
+                        help='Write the directory tree to FILE, or - to print it')
+    parser.add_argument('--ignore', nargs='*', default=[], help='Folder name(s) to ignore')
+    parser.add_argument('--ignore-ext', nargs='*', default=[], help='File extension(s) to ignore')
+    parser.add_argument('--respect-gitignore', action='store_true',
+                        help='Also skip paths excluded by .gitignore and .ignore files')
+    parser.add_argument('--watch', action='store_true',
+                        help='After the first pass, keep watching the source and process only what changes')
+    parser.add_argument('--debounce', type=float, default=0.5, metavar='SECONDS',
+                        help='With --watch, wait for this much quiet before handling changes (default: 0.5)')
+    parser.add_argument('--poll', action='store_true',
+                        help='With --watch, poll the tree every second instead of using inotify')
+    stats.add_arguments(parser)
+    progress.add_arguments(parser)
+    startup.add_arguments(parser)
+
+    args = parser.parse_args()
+    if not (args.annotate or args.flatten or args.tree):
+        parser.error("nothing to do: give at least one of --annotate, --flatten and --tree")
+
+    if not os.path.isdir(args.source):
+        print(f"Error: Source directory '{args.source}' does not exist.")
+        return
+
+    if args.languages:
+        try:
+            tool("annotate").load_languages(args.languages)
+        except (OSError, ValueError) as e:
+            print(f"Failed to load languages from {args.languages}: {e}")
+            return
+
+    stages = build_stages(args)
+    print(f"Source: {os.path.abspath(args.source)}")
+    print(f"Stages: {', '.join(stage.name for stage in stages)}")
+    print("-" * 50)
+
+    pipeline = Pipeline(args.source, stages, args.ignore, args.ignore_ext, args.respect_gitignore)
+    try:
+        with stats.collecting(args), progress.reporting(args, "pipeline", pipeline.count):
+            summaries = pipeline.run()
+    except OSError as e:
+        print(f"Error: {e}")
+        return
+    print_summary(summaries)
+
+    if args.watch:
+        print(f"Watching {os.path.abspath(args.source)} for changes (Ctrl+C to stop)...")
+        try:
+            pipeline.watch(args.debounce, poll=args.poll)
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+
+if __name__ == "__main__":
+    main()
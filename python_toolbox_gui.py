@@ -7,10 +7,80 @@ A simple GUI interface to run various Python scripts in the toolbox.
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import os
-import subprocess
+import json
+import queue
 import sys
 import threading
-from pathlib import Path
+import multiprocessing
+
+from toolbox_common.progress import EVENT_PREFIX
+from toolbox_common.worker import WarmWorker
+
+# Output is queued by worker threads and drained by the Tk main loop this often
+OUTPUT_POLL_MS = 50
+
+# Most queued chunks handled per drain, so one tick never blocks the UI for long
+OUTPUT_BATCH_LIMIT = 5000
+
+# Lines kept in the output view; older ones are dropped (the log file keeps everything)
+OUTPUT_MAX_LINES = 5000
+
+# Queued by a worker thread when its run is over, so the log file can be closed
+RUN_FINISHED = object()
+
+# Steps of the progress bar when the total is known
+PROGRESS_STEPS = 1000
+
+def split_progress(text):
+    """Separate progress event lines from script output; return (text, events)."""
+    if EVENT_PREFIX not in text:
+        return text, []
+    kept = []
+    events = []
+    for line in text.splitlines(keepends=True):
+        if line.startswith(EVENT_PREFIX):
+            try:
+                events.append(json.loads(line))
+                continue
+            except ValueError:
+                pass
+        kept.append(line)
+    return "".join(kept), events
+
+def format_bytes(num_bytes):
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def describe_progress(event):
+    """Turn a progress event into the status line shown under the progress bar."""
+    if event["progress"] == "prescan":
+        return "Counting files..."
+    files = f"{event['files_done']:,}"
+    if event["files_total"] is not None:
+        files += f" / {event['files_total']:,}"
+    parts = [f"{event['progress'].capitalize()}: {files} files"]
+    if event["bytes_done"] or event["bytes_total"]:
+        size = format_bytes(event["bytes_done"])
+        if event["bytes_total"] is not None:
+            size += f" / {format_bytes(event['bytes_total'])}"
+        parts.append(size)
+    if event["files_per_s"]:
+        parts.append(f"{event['files_per_s']:,.0f} files/s")
+    if event["bytes_per_s"]:
+        parts.append(f"{format_bytes(event['bytes_per_s'])}/s")
+    if event["done"]:
+        parts.append(f"done in {format_duration(event['elapsed'])}")
+    elif event["eta"] is not None:
+        parts.append(f"ETA {format_duration(event['eta'])}")
+    return " · ".join(parts)
 
 class PythonToolboxGUI:
     def __init__(self, root):
@@ -19,31 +89,35 @@ class PythonToolboxGUI:
         self.root.geometry("800x600")
         
         # Get the directory where this script is located
-        self.base_dir = Path(__file__).parent.absolute()
+        self.base_dir = os.path.dirname(os.path.abspath(__file__))
         
         # Script configurations
         self.scripts = {
             "Tree Visualizer": {
-                "path": self.base_dir / "directory-tools" / "tree_visualizer.py",
+                "path": os.path.join(self.base_dir, "directory-tools", "tree_visualizer.py"),
                 "description": "Pretty-print folder structure using Rich",
                 "inputs": [
                     {"name": "Path", "type": "folder", "required": True, "help": "Folder path to visualize"},
                     {"name": "Ignore Folders", "type": "text", "required": False, "help": "Space-separated folder names to ignore (e.g., node_modules .git)"},
-                    {"name": "Ignore Extensions", "type": "text", "required": False, "help": "Space-separated file extensions to ignore (e.g., .log .png)"}
+                    {"name": "Ignore Extensions", "type": "text", "required": False, "help": "Space-separated file extensions to ignore (e.g., .log .png)"},
+                    {"name": "Respect .gitignore", "type": "checkbox", "required": False, "help": "Also skip paths excluded by .gitignore and .ignore files"},
+                    {"name": "Show Statistics", "type": "checkbox", "required": False, "help": "Print phase timings, counters and the slowest files when done"}
                 ]
             },
             "File Path Annotator": {
-                "path": self.base_dir / "code-annotation-tools" / "file_path_annotator.py",
+                "path": os.path.join(self.base_dir, "code-annotation-tools", "file_path_annotator.py"),
                 "description": "Add file path comments to code files",
                 "inputs": [
                     {"name": "Base Folder", "type": "folder", "required": True, "help": "Base folder to process"},
                     {"name": "Make Copy", "type": "checkbox", "required": False, "help": "Make a copy of the folder first"},
                     {"name": "Extensions", "type": "text", "required": False, "help": "File extensions to include (e.g., .ts .tsx .py)"},
-                    {"name": "Ignore Folders", "type": "text", "required": False, "help": "Folder names to ignore (e.g., node_modules .git)"}
+                    {"name": "Ignore Folders", "type": "text", "required": False, "help": "Folder names to ignore (e.g., node_modules .git)"},
+                    {"name": "Respect .gitignore", "type": "checkbox", "required": False, "help": "Also skip paths excluded by .gitignore and .ignore files"},
+                    {"name": "Show Statistics", "type": "checkbox", "required": False, "help": "Print phase timings, counters and the slowest files when done"}
                 ]
             },
             "File Flattener": {
-                "path": self.base_dir / "file-management-tools" / "file_flattener.py",
+                "path": os.path.join(self.base_dir, "file-management-tools", "file_flattener.py"),
                 "description": "Recursively copy files with path-based renaming",
                 "inputs": [
                     {"name": "Source Directory", "type": "folder", "required": True, "help": "Source directory to copy from"},
@@ -55,7 +129,9 @@ class PythonToolboxGUI:
                     {"name": "Common Ignore Extensions", "type": "checkbox_group", "required": False,
                      "help": "Select common file types to ignore",
                      "options": [".log", ".tmp", ".cache", ".lock", ".DS_Store", ".thumbs.db", ".exe", ".dll", ".so", ".o", ".pyc"]},
-                    {"name": "Custom Ignore Extensions", "type": "text", "required": False, "help": "Additional file extensions to ignore (space-separated, e.g., .png .ico)"}
+                    {"name": "Custom Ignore Extensions", "type": "text", "required": False, "help": "Additional file extensions to ignore (space-separated, e.g., .png .ico)"},
+                    {"name": "Respect .gitignore", "type": "checkbox", "required": False, "help": "Also skip paths excluded by .gitignore and .ignore files"},
+                    {"name": "Show Statistics", "type": "checkbox", "required": False, "help": "Print phase timings, counters and the slowest files when done"}
                 ]
             }
         }
@@ -63,7 +139,32 @@ class PythonToolboxGUI:
         # Track running process
         self.running_process = None
         
+        # Warm worker process that runs the tools in-process; started as soon as
+        # the window is up so the tool imports are done before the first run
+        self.worker = WarmWorker()
+        self.use_worker = tk.BooleanVar(value=True)
+        
+        # Scripts report JSON progress events instead of a line per file. Both are
+        # off by default: the events replace the per-file lines of the output and
+        # the log, and a pre-scan walks the whole tree once more to get totals
+        self.show_progress = tk.BooleanVar(value=False)
+        self.prescan = tk.BooleanVar(value=False)
+        
+        # Output waiting to be shown, and the optional full log of the current run
+        self.output_queue = queue.Queue()
+        self.log_file = None
+        
         self.setup_ui()
+        self.root.after(OUTPUT_POLL_MS, self.drain_output)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after_idle(self.start_worker)
+    
+    def start_worker(self):
+        try:
+            self.worker.start()
+        except Exception:
+            # Fall back to a fresh interpreter per run
+            self.use_worker.set(False)
         
     def setup_ui(self):
         # Main frame
@@ -107,7 +208,11 @@ class PythonToolboxGUI:
         self.stop_button.pack(side=tk.LEFT, padx=(0, 10))
         
         self.clear_button = ttk.Button(button_frame, text="Clear Output", command=self.clear_output)
-        self.clear_button.pack(side=tk.LEFT)
+        self.clear_button.pack(side=tk.LEFT, padx=(0, 10))
+        
+        ttk.Checkbutton(button_frame, text="Fast start (warm worker)", variable=self.use_worker).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Checkbutton(button_frame, text="Progress bar", variable=self.show_progress).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Checkbutton(button_frame, text="Pre-scan for ETA", variable=self.prescan).pack(side=tk.LEFT)
         
         # Output frame
         output_frame = ttk.LabelFrame(main_frame, text="Output", padding="10")
@@ -118,6 +223,28 @@ class PythonToolboxGUI:
         self.output_text = scrolledtext.ScrolledText(output_frame, height=15, state="disabled")
         self.output_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
+        # Progress of the current run, fed by the scripts' progress events
+        progress_frame = ttk.Frame(output_frame)
+        progress_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
+        progress_frame.columnconfigure(0, weight=1)
+        
+        self.progress_bar = ttk.Progressbar(progress_frame, maximum=PROGRESS_STEPS)
+        self.progress_bar.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        self.progress_label = ttk.Label(progress_frame, text="")
+        self.progress_label.grid(row=1, column=0, sticky=tk.W)
+        self.progress_path = ttk.Label(progress_frame, text="", foreground="gray", font=("Arial", 8))
+        self.progress_path.grid(row=2, column=0, sticky=tk.W)
+        
+        # Optional file that receives the full output, beyond what the view keeps
+        log_frame = ttk.Frame(output_frame)
+        log_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
+        log_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(log_frame, text="Full log file:").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
+        self.log_entry = ttk.Entry(log_frame)
+        self.log_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 5))
+        ttk.Button(log_frame, text="Browse", command=self.browse_log_file).grid(row=0, column=2)
+        
         # Configure main grid weights
         main_frame.rowconfigure(4, weight=1)
         main_frame.rowconfigure(6, weight=2)
@@ -211,6 +338,13 @@ class PythonToolboxGUI:
             entry_widget.delete(0, tk.END)
             entry_widget.insert(0, folder)
     
+    def browse_log_file(self):
+        path = filedialog.asksaveasfilename(defaultextension=".log",
+                                            filetypes=[("Log files", "*.log"), ("All files", "*.*")])
+        if path:
+            self.log_entry.delete(0, tk.END)
+            self.log_entry.insert(0, path)
+    
     def validate_inputs(self):
         script_name = self.script_var.get()
         if not script_name:
@@ -249,83 +383,98 @@ class PythonToolboxGUI:
         
         return True
     
-    def build_command(self):
-        script_name = self.script_var.get()
-        script_config = self.scripts[script_name]
-        script_path = script_config["path"]
+    def collect_options(self):
+        """Read the inputs of the selected script into (job name, keyword options).
         
-        cmd = [sys.executable, str(script_path)]
+        The options match the run_* functions in toolbox_common.worker; 
+        build_command turns the same options into a command line.
+        """
+        script_name = self.script_var.get()
         
-        # Add arguments based on script type
         if script_name == "Tree Visualizer":
-            path = self.input_widgets["Path"].get().strip()
-            cmd.append(path)
-            
-            ignore_folders = self.input_widgets["Ignore Folders"].get().strip()
-            if ignore_folders:
-                cmd.extend(["--ignore"] + ignore_folders.split())
-            
-            ignore_exts = self.input_widgets["Ignore Extensions"].get().strip()
-            if ignore_exts:
-                cmd.extend(["--ignore-ext"] + ignore_exts.split())
+            job = "tree"
+            options = {
+                "path": self.input_widgets["Path"].get().strip(),
+                "ignore": self.input_widgets["Ignore Folders"].get().split(),
+                "ignore_ext": self.input_widgets["Ignore Extensions"].get().split(),
+            }
         
         elif script_name == "File Path Annotator":
-            base_folder = self.input_widgets["Base Folder"].get().strip()
-            cmd.append(base_folder)
-            
-            if self.input_widgets["Make Copy"].get():
+            job = "annotate"
+            options = {
+                "base_folder": self.input_widgets["Base Folder"].get().strip(),
+                "make_copy": bool(self.input_widgets["Make Copy"].get()),
+                "extensions": self.input_widgets["Extensions"].get().split(),
+                "ignore": self.input_widgets["Ignore Folders"].get().split(),
+            }
+        
+        else:
+            job = "flatten"
+            # Collect ignore folders and extensions from checkboxes and custom input
+            ignore_folders = [folder for folder, var in self.input_widgets["Common Ignore Folders"].items() if var.get()]
+            ignore_folders.extend(self.input_widgets["Custom Ignore Folders"].get().split())
+            ignore_exts = [ext for ext, var in self.input_widgets["Common Ignore Extensions"].items() if var.get()]
+            ignore_exts.extend(self.input_widgets["Custom Ignore Extensions"].get().split())
+            options = {
+                "source": self.input_widgets["Source Directory"].get().strip(),
+                "destination": self.input_widgets["Destination Directory"].get().strip(),
+                "ignore": ignore_folders,
+                "ignore_ext": ignore_exts,
+            }
+        
+        # Shared by all scripts
+        options["respect_gitignore"] = bool(self.input_widgets["Respect .gitignore"].get())
+        options["stats"] = bool(self.input_widgets["Show Statistics"].get())
+        options["progress"] = bool(self.show_progress.get())
+        options["prescan"] = options["progress"] and bool(self.prescan.get())
+        return job, options
+    
+    def build_command(self):
+        """Build the command line that runs the selected script in a fresh interpreter."""
+        script_config = self.scripts[self.script_var.get()]
+        job, options = self.collect_options()
+        
+        cmd = [sys.executable]
+        if options["progress"]:
+            # Unbuffered, so an event on stderr never lands inside a half-written stdout line
+            cmd.append("-u")
+        cmd.append(script_config["path"])
+        
+        if job == "tree":
+            cmd.append(options["path"])
+        elif job == "annotate":
+            cmd.append(options["base_folder"])
+            if options["make_copy"]:
                 cmd.append("--makeCopy")
-            
-            extensions = self.input_widgets["Extensions"].get().strip()
-            if extensions:
-                cmd.extend(["--extensions"] + extensions.split())
-            
-            ignore_folders = self.input_widgets["Ignore Folders"].get().strip()
-            if ignore_folders:
-                cmd.extend(["--ignore"] + ignore_folders.split())
-        
-        elif script_name == "File Flattener":
-            source = self.input_widgets["Source Directory"].get().strip()
-            dest = self.input_widgets["Destination Directory"].get().strip()
-            cmd.extend([source, dest])
-            
-            # Collect ignore folders from checkboxes and custom input
-            ignore_folders = []
-            
-            # Common ignore folders (checkboxes)
-            common_ignore = self.input_widgets["Common Ignore Folders"]
-            for folder, var in common_ignore.items():
-                if var.get():
-                    ignore_folders.append(folder)
-            
-            # Custom ignore folders (text input)
-            custom_ignore = self.input_widgets["Custom Ignore Folders"].get().strip()
-            if custom_ignore:
-                ignore_folders.extend(custom_ignore.split())
-            
-            if ignore_folders:
-                cmd.extend(["--ignore"] + ignore_folders)
-            
-            # Collect ignore extensions from checkboxes and custom input
-            ignore_exts = []
-            
-            # Common ignore extensions (checkboxes)
-            common_exts = self.input_widgets["Common Ignore Extensions"]
-            for ext, var in common_exts.items():
-                if var.get():
-                    ignore_exts.append(ext)
-            
-            # Custom ignore extensions (text input)
-            custom_exts = self.input_widgets["Custom Ignore Extensions"].get().strip()
-            if custom_exts:
-                ignore_exts.extend(custom_exts.split())
-            
-            if ignore_exts:
-                cmd.extend(["--ignore-ext"] + ignore_exts)
+            if options["extensions"]:
+                cmd.extend(["--extensions"] + options["extensions"])
+        else:
+            cmd.extend([options["source"], options["destination"]])
+        
+        if options["ignore"]:
+            cmd.extend(["--ignore"] + options["ignore"])
+        if options.get("ignore_ext"):
+            cmd.extend(["--ignore-ext"] + options["ignore_ext"])
+        if options["respect_gitignore"]:
+            cmd.append("--respect-gitignore")
+        if options["stats"]:
+            cmd.append("--stats")
+        if options["progress"]:
+            cmd.append("--progress")
+        if options["prescan"]:
+            cmd.append("--prescan")
         
         return cmd
     
     def stop_script(self):
+        if self.worker.busy:
+            # Ask the job to stop; the worker is killed if it does not stop in time.
+            # run_job_thread reports the outcome; drain_output re-enables the Run button.
+            self.worker.cancel()
+            self.append_output("\n🛑 Stopping...\n")
+            self.stop_button.config(state="disabled")
+            return
+        
         if self.running_process:
             try:
                 self.running_process.terminate()
@@ -339,11 +488,89 @@ class PythonToolboxGUI:
         self.stop_button.config(state="disabled")
     
     def append_output(self, text):
-        self.output_text.config(state="normal")
-        self.output_text.insert(tk.END, text)
-        self.output_text.see(tk.END)
-        self.output_text.config(state="disabled")
-        self.root.update_idletasks()
+        """Queue text for the output view; safe to call from any thread."""
+        self.output_queue.put(text)
+    
+    def drain_output(self):
+        """Show queued output in one batch and re-arm the timer (Tk main loop only).
+        
+        Every chunk goes to the log file, but the view only keeps the last
+        OUTPUT_MAX_LINES lines, so it stays fast however much a script prints.
+        """
+        chunks = []
+        finished = False
+        try:
+            while len(chunks) < OUTPUT_BATCH_LIMIT:
+                chunk = self.output_queue.get_nowait()
+                if chunk is RUN_FINISHED:
+                    finished = True
+                    break
+                chunks.append(chunk)
+        except queue.Empty:
+            pass
+        
+        text, events = split_progress("".join(chunks))
+        if events:
+            # Only the latest state matters
+            self.show_progress_event(events[-1])
+        
+        if text:
+            if self.log_file:
+                try:
+                    self.log_file.write(text)
+                except OSError:
+                    self.close_log_file()
+            
+            if text.count("\n") > OUTPUT_MAX_LINES:
+                text = "".join(text.splitlines(keepends=True)[-OUTPUT_MAX_LINES:])
+            self.output_text.config(state="normal")
+            self.output_text.insert(tk.END, text)
+            # Drop the oldest lines once the view holds more than OUTPUT_MAX_LINES
+            # The text ends with a newline, so the last line Tk reports is empty
+            line_count = int(self.output_text.index("end-1c").split(".")[0]) - 1
+            if line_count > OUTPUT_MAX_LINES:
+                self.output_text.delete("1.0", f"{line_count - OUTPUT_MAX_LINES + 1}.0")
+            self.output_text.see(tk.END)
+            self.output_text.config(state="disabled")
+        
+        if finished:
+            self.close_log_file()
+            self.run_button.config(state="normal")
+            self.stop_button.config(state="disabled")
+        
+        # Come back right away while a backlog remains
+        busy = finished or len(chunks) >= OUTPUT_BATCH_LIMIT
+        self.root.after(1 if busy else OUTPUT_POLL_MS, self.drain_output)
+    
+    def show_progress_event(self, event):
+        """Update the progress bar and its labels from one progress event (Tk main loop only)."""
+        if event["bytes_total"]:
+            fraction = event["bytes_done"] / event["bytes_total"]
+        elif event["files_total"]:
+            fraction = event["files_done"] / event["files_total"]
+        else:
+            fraction = None
+        
+        if event["done"]:
+            fraction = 1.0
+        if fraction is None:
+            # No totals (no pre-scan, or it is still running): just show activity
+            self.progress_bar.config(mode="indeterminate")
+            self.progress_bar.step(PROGRESS_STEPS // 50)
+        else:
+            self.progress_bar.config(mode="determinate", value=min(fraction, 1.0) * PROGRESS_STEPS)
+        self.progress_label.config(text=describe_progress(event))
+        self.progress_path.config(text=event["path"] or "")
+    
+    def reset_progress(self):
+        self.progress_bar.config(mode="determinate", value=0)
+        self.progress_label.config(text="")
+        self.progress_path.config(text="")
+    
+    def close_log_file(self):
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
     
     def clear_output(self):
         self.output_text.config(state="normal")
@@ -351,6 +578,7 @@ class PythonToolboxGUI:
         self.output_text.config(state="disabled")
     
     def run_script_thread(self, cmd):
+        import subprocess
         try:
             self.append_output(f"Running command: {' '.join(cmd)}\n")
             self.append_output("-" * 50 + "\n")
@@ -395,35 +623,86 @@ class PythonToolboxGUI:
             self.append_output("• Invalid file paths\n")
             self.append_output("• Permission issues\n")
         finally:
-            # Reset process and re-enable buttons
+            # drain_output re-enables the buttons when it reaches this marker
             self.running_process = None
-            self.root.after(0, lambda: [
-                self.run_button.config(state="normal"),
-                self.stop_button.config(state="disabled")
-            ])
+            self.output_queue.put(RUN_FINISHED)
+    
+    def run_job_thread(self, script_name, job, options):
+        """Run a job in the warm worker (see toolbox_common.worker)."""
+        try:
+            self.append_output(f"Running {script_name} in the warm worker\n")
+            self.append_output("-" * 50 + "\n")
+            
+            status = self.worker.run(job, options, self.append_output)
+            
+            self.append_output("\n" + "=" * 50 + "\n")
+            if status == "ok":
+                self.append_output("✅ Script completed successfully!\n")
+            elif status == "cancelled":
+                self.append_output("🛑 Script stopped by user.\n")
+            elif status == "killed":
+                self.append_output("🛑 Script did not stop in time and was terminated.\n")
+            else:
+                self.append_output("❌ Script completed with errors (see the traceback above)\n")
+        
+        except Exception as e:
+            self.append_output(f"\n❌ Error running script: {str(e)}\n")
+        finally:
+            # drain_output re-enables the buttons when it reaches this marker
+            self.output_queue.put(RUN_FINISHED)
     
     def run_script(self):
         if not self.validate_inputs():
             return
         
+        log_path = self.log_entry.get().strip()
+        if log_path:
+            self.close_log_file()
+            try:
+                self.log_file = open(log_path, "w", encoding="utf-8")
+            except OSError as e:
+                messagebox.showerror("Error", f"Cannot open log file: {e}")
+                return
+        
         try:
-            cmd = self.build_command()
+            if self.use_worker.get():
+                job, options = self.collect_options()
+                target, args = self.run_job_thread, (self.script_var.get(), job, options)
+            else:
+                target, args = self.run_script_thread, (self.build_command(),)
+            
+            self.reset_progress()
             
             # Update button states
             self.run_button.config(state="disabled")
             self.stop_button.config(state="normal")
             
             # Run script in separate thread
-            thread = threading.Thread(target=self.run_script_thread, args=(cmd,))
+            thread = threading.Thread(target=target, args=args)
             thread.daemon = True
             thread.start()
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to run script: {str(e)}")
+            self.close_log_file()
             self.run_button.config(state="normal")
             self.stop_button.config(state="disabled")
 
+    def on_close(self):
+        self.worker.shutdown()
+        self.root.destroy()
+
 def main():
+    # Lets the worker process start from a PyInstaller build
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        # The GUI takes no other options, so argparse is only loaded for this one
+        import argparse
+        from toolbox_common import startup
+        parser = argparse.ArgumentParser(description="Python Toolbox GUI")
+        startup.add_arguments(parser, target=["-c", "import python_toolbox_gui"],
+                              cwd=os.path.dirname(os.path.abspath(__file__)), depth=1)
+        parser.parse_args()
     root = tk.Tk()
     app = PythonToolboxGUI(root)
     root.mainloop()
@@ -0,0 +1,55 @@
+"""
+Regression checks for file-management-tools/file_flattener.py.
+
+Run from the repository root with: python -m unittest discover tests
+"""
+
+import os
+import sys
+import errno
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolbox_common.scripts import load_script
+
+flattener = load_script("flatten")
+
+
+def cannot_clone(src_file, dest_file):
+    raise OSError(errno.EOPNOTSUPP, "FICLONE is not supported")
+
+
+class AutoLinkMode(unittest.TestCase):
+    """Where cloning fails, auto must hard-link instead of copying the bytes."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmp, "src.txt")
+        with open(self.src, "w") as f:
+            f.write("data\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_hardlink_after_failed_clone(self):
+        with mock.patch.dict(flattener.AUTO_FUNCTIONS, {"reflink": cannot_clone}):
+            place = flattener.make_placer("auto")
+            for name in ("a.txt", "b.txt"):
+                dest = os.path.join(self.tmp, name)
+                place(self.src, dest)
+                self.assertTrue(os.path.samefile(self.src, dest))
+
+    def test_copy_when_nothing_links(self):
+        with mock.patch.dict(flattener.AUTO_FUNCTIONS, {"reflink": cannot_clone, "hardlink": cannot_clone}):
+            dest = os.path.join(self.tmp, "a.txt")
+            flattener.make_placer("auto")(self.src, dest)
+        self.assertFalse(os.path.samefile(self.src, dest))
+        with open(dest) as f:
+            self.assertEqual(f.read(), "data\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
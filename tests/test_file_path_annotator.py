@@ -0,0 +1,64 @@
+"""
+Regression checks for code-annotation-tools/file_path_annotator.py.
+
+Run from the repository root with: python -m unittest discover tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolbox_common.scripts import load_script
+
+annotator = load_script("annotate")
+
+
+class RewriteThroughLinks(unittest.TestCase):
+    """A rewrite must change the linked file, not replace the link with a new file."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.base = os.path.join(self.tmp, "base")
+        self.shared = os.path.join(self.tmp, "shared")
+        os.mkdir(self.base)
+        os.mkdir(self.shared)
+        self.target = os.path.join(self.shared, "util.ts")
+        with open(self.target, "wb") as f:
+            f.write(b"export const u = 1;\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_symlinked_file(self):
+        link = os.path.join(self.base, "util.ts")
+        os.symlink(self.target, link)
+        annotator.update_comment(link, "util.ts")
+        self.assertTrue(os.path.islink(link))
+        self.assertEqual(self.read(self.target), b"// File: util.ts\nexport const u = 1;\n")
+
+    def test_symlinked_file_with_copy(self):
+        link = os.path.join(self.base, "util.ts")
+        copy = os.path.join(self.tmp, "copy.ts")
+        os.symlink(self.target, link)
+        annotator.annotate_copy(link, "util.ts", [copy])
+        self.assertTrue(os.path.islink(link))
+        self.assertEqual(self.read(self.target), b"// File: util.ts\nexport const u = 1;\n")
+        self.assertEqual(self.read(copy), self.read(self.target))
+
+    def test_hard_linked_file(self):
+        other = os.path.join(self.base, "util.ts")
+        os.link(self.target, other)
+        annotator.update_comment(other, "util.ts")
+        self.assertTrue(os.path.samefile(other, self.target))
+        self.assertEqual(self.read(self.target), b"// File: util.ts\nexport const u = 1;\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Regression checks for toolbox_common.pipeline.
+
+Run from the repository root with: python -m unittest discover tests
+"""
+
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolbox_common.pipeline import AnnotateStage, FlattenStage, Pipeline
+from toolbox_common.watch import InotifyWatcher
+
+
+def run_quietly(pipeline):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return pipeline.run()
+
+
+class AnnotateIntoLinkedDestination(unittest.TestCase):
+    """Annotating into a DEST that a link run filled must not touch the source through the links."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmp, "src")
+        self.dest = os.path.join(self.tmp, "flat")
+        os.mkdir(self.source)
+        self.body = b"".join(b"const line%d = %d;\n" % (i, i) for i in range(20000))
+        self.file = os.path.join(self.source, "x.ts")
+        with open(self.file, "wb") as f:
+            f.write(self.body)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def check(self, link_mode):
+        run_quietly(Pipeline(self.source, [FlattenStage(self.dest, link_mode)]))
+        summaries = run_quietly(Pipeline(self.source, [AnnotateStage({".ts"}), FlattenStage(self.dest)]))
+
+        expected = b"// File: x.ts\n" + self.body
+        with open(self.file, "rb") as f:
+            self.assertEqual(f.read(), expected)
+        copy = os.path.join(self.dest, "src_x.ts")
+        self.assertFalse(os.path.islink(copy))
+        self.assertFalse(os.path.samefile(copy, self.file))
+        with open(copy, "rb") as f:
+            self.assertEqual(f.read(), expected)
+        self.assertEqual(summaries["flatten"]["failed"], 0)
+        self.assertEqual([name for name in os.listdir(self.dest) if name.endswith(".tmp")], [])
+
+    def test_after_hardlink_run(self):
+        self.check("hardlink")
+
+    def test_after_symlink_run(self):
+        self.check("symlink")
+
+
+class RescanAfterLostEvents(unittest.TestCase):
+    """A rescan must catch up with deletions and new folders that no event reported."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmp, "src")
+        self.dest = os.path.join(self.tmp, "flat")
+        os.makedirs(os.path.join(self.source, "old"))
+        for rel in ("keep.txt", os.path.join("old", "gone.txt")):
+            with open(os.path.join(self.source, rel), "w") as f:
+                f.write(rel)
+        self.pipeline = Pipeline(self.source, [FlattenStage(self.dest)])
+        run_quietly(self.pipeline)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_outputs_of_vanished_files_are_removed(self):
+        os.remove(os.path.join(self.source, "old", "gone.txt"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.pipeline.update({"": "rescan"})
+        self.assertEqual(sorted(os.listdir(self.dest)), ["src_keep.txt"])
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux only")
+    def test_new_folders_are_watched(self):
+        watcher = InotifyWatcher(self.source, self.pipeline.matcher)
+        self.addCleanup(watcher.close)
+        os.makedirs(os.path.join(self.source, "new", "deeper"))
+        watcher.rebuild()
+        self.assertIn(os.path.join("new", "deeper"), watcher.dirs.values())
+
+
+if __name__ == "__main__":
+    unittest.main()
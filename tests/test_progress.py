@@ -0,0 +1,56 @@
+"""
+Regression checks for toolbox_common.progress.
+
+Run from the repository root with: python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolbox_common import progress
+
+
+class Stopped(BaseException):
+    pass
+
+
+class StoppedStream:
+    """Output that raises on every write, like the GUI worker's after Stop."""
+
+    def write(self, text):
+        raise Stopped()
+
+    def flush(self):
+        pass
+
+
+class ReportingAfterStop(unittest.TestCase):
+    """A reporter whose output raises must not outlive its with block."""
+
+    def setUp(self):
+        self.stderr = sys.stderr
+        sys.stderr = StoppedStream()
+
+    def tearDown(self):
+        sys.stderr = self.stderr
+        progress.disable()
+
+    def check(self, prescan):
+        args = SimpleNamespace(progress=True, prescan=prescan)
+        with self.assertRaises(Stopped):
+            with progress.reporting(args, "copy", lambda: (1, 1)):
+                pass
+        self.assertFalse(progress.current.enabled)
+
+    def test_without_prescan(self):
+        self.check(False)
+
+    def test_with_prescan(self):
+        self.check(True)
+
+
+if __name__ == "__main__":
+    unittest.main()
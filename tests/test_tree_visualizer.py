@@ -0,0 +1,88 @@
+"""
+Regression checks for directory-tools/tree_visualizer.py.
+
+Run from the repository root with: python -m unittest discover tests
+"""
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolbox_common.scripts import load_script
+
+tree_visualizer = load_script("tree")
+
+MARKUP = re.compile(r"\[/?(?:bold |dim|red|green|blue|yellow|cyan)[^\]]*\]|\[/\]")
+
+# Guides differ where the stream cannot know yet that an entry is the last one shown
+GUIDES = re.compile(r"^(?:[│ ]   )*[├└]── ")
+
+
+def entries(lines):
+    """(depth, label) for each line below the root."""
+    return [(len(GUIDES.match(line).group()) // 4, GUIDES.sub("", line)) for line in lines[1:]]
+
+
+class Node:
+    """Enough of rich.tree.Tree for build_tree, rendered like iter_tree_lines."""
+
+    def __init__(self, label):
+        self.label = label
+        self.children = []
+
+    def add(self, label):
+        child = Node(label)
+        self.children.append(child)
+        return child
+
+    def lines(self, prefix=""):
+        for i, child in enumerate(self.children):
+            last = i == len(self.children) - 1
+            yield prefix + ("└── " if last else "├── ") + MARKUP.sub("", child.label)
+            yield from child.lines(prefix + ("    " if last else "│   "))
+
+
+class BudgetInDisplayOrder(unittest.TestCase):
+    """The Rich tree and --stream must spend a budget on the same, first-shown entries."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for folder in ("a", "b", "c"):
+            os.mkdir(os.path.join(self.root, folder))
+            for name in ("f1", "f2", "f3"):
+                open(os.path.join(self.root, folder, name), "w").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def render_both(self, **limits):
+        tree = Node(self.root)
+        tree_visualizer.build_tree(self.root, tree, [], [], budget=tree_visualizer.WalkBudget(6), **limits)
+        streamed = list(tree_visualizer.iter_tree_lines(self.root, [], [],
+                                                        budget=tree_visualizer.WalkBudget(6), **limits))
+        return entries([self.root, *tree.lines()]), entries(streamed)
+
+    def test_same_entries(self):
+        built, streamed = self.render_both()
+        self.assertEqual(built, streamed)
+        self.assertEqual(streamed, [
+            (1, "a/"),
+            (2, "f1"),
+            (2, "f2"),
+            (2, "f3"),
+            (1, "b/"),
+            (2, "f1"),
+            (2, "… stopped: entry budget reached (0 dirs, 2 files not shown)"),
+        ])
+
+    def test_same_entries_with_max_entries(self):
+        built, streamed = self.render_both(max_entries=2)
+        self.assertEqual(built, streamed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+"""
+.gitignore support for the shared walker.
+
+Ignore files are read lazily, one folder at a time, the first time the
+walker asks about something inside that folder. The patterns of each file
+are compiled into a single regular expression, so most lookups cost one
+regex match per ignore file on the path instead of one per pattern.
+"""
+
+import os
+import re
+
+from toolbox_common.walker import IgnoreMatcher
+
+# Read in this order inside each folder; later files take precedence
+IGNORE_FILES = (".gitignore", ".ignore")
+
+
+def find_repo_root(path):
+    """Return the closest folder at or above path that contains .git, or None."""
+    path = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(path, ".git")):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def glob_to_regex(pattern):
+    """Translate one gitignore glob into a regex body ("*" never crosses "/")."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+                if pattern[i + 2:i + 3] == "/":
+                    out.append("(?:.*/)?")
+                    i += 3
+                    continue
+                if i + 2 == n:
+                    out.append(".*")
+                    i += 2
+                    continue
+            out.append("[^/]*")
+            while i + 1 < n and pattern[i + 1] == "*":
+                i += 1
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = i + 1
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j].replace("\\", "\\\\")
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def parse_pattern(line):
+    """Parse one line of an ignore file into (regex, negate, dir_only), or None.
+
+    The regex matches a "/"-separated path relative to the folder holding
+    the ignore file. Patterns without a "/" (other than a trailing one)
+    match at any depth below that folder.
+    """
+    line = line.rstrip("\r\n")
+    if not line or line.startswith("#"):
+        return None
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    anchored = "/" in line
+    regex = glob_to_regex(line.lstrip("/"))
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return regex, negate, dir_only
+
+
+class IgnoreRules:
+    """The compiled patterns of the ignore files in one folder."""
+
+    __slots__ = ("rules", "dir_regex", "file_regex", "has_negation")
+
+    def __init__(self, patterns):
+        self.rules = [(re.compile(regex), negate, dir_only) for regex, negate, dir_only in patterns]
+        self.has_negation = any(negate for _, negate, _ in patterns)
+        self.dir_regex = self._combine(patterns)
+        self.file_regex = self._combine([p for p in patterns if not p[2]])
+
+    @staticmethod
+    def _combine(patterns):
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{regex})" for regex, _, _ in patterns))
+
+    def match(self, path, is_dir):
+        """Return True (ignored), False (re-included by "!") or None (no pattern matches)."""
+        combined = self.dir_regex if is_dir else self.file_regex
+        if combined is None or combined.fullmatch(path) is None:
+            return None
+        if not self.has_negation:
+            return True
+        # The last matching pattern wins
+        for regex, negate, dir_only in reversed(self.rules):
+            if (is_dir or not dir_only) and regex.fullmatch(path):
+                return not negate
+        return None
+
+
+class GitignoreMatcher(IgnoreMatcher):
+    """IgnoreMatcher that also honours .gitignore and .ignore files.
+
+    Ignore files are looked up from the enclosing git repository's root (or
+    from root when it is not inside a repository) down to each folder, so
+    patterns from parent folders apply too. Deeper files override shallower
+    ones, .ignore overrides .gitignore in the same folder, and within a file
+    the last matching pattern wins. .git/info/exclude is read at the
+    repository root and .git folders are always skipped.
+
+    rel_path must be given relative to root; ignored folders are pruned by
+    the walker, so nothing inside them is listed.
+    """
+
+    __slots__ = ("root", "_top", "_prefix", "_chains")
+
+    def __init__(self, root, folders=(), extensions=(), names=()):
+        super().__init__((*folders, ".git"), extensions, names)
+        self.root = os.path.abspath(root)
+        self._top = find_repo_root(self.root) or self.root
+        rel = os.path.relpath(self.root, self._top)
+        self._prefix = "" if rel == "." else rel.replace(os.sep, "/") + "/"
+        # "/"-separated folder, relative to _top -> [(offset, IgnoreRules)]
+        self._chains = {}
+
+    def ignores_dir(self, name, rel_path=None):
+        if name in self.folders:
+            return True
+        return rel_path is not None and self._ignored(rel_path, True)
+
+    def ignores_file(self, name, rel_path=None):
+        if super().ignores_file(name, rel_path):
+            return True
+        return rel_path is not None and self._ignored(rel_path, False)
+
+    def _ignored(self, rel_path, is_dir):
+        path = self._prefix + rel_path.replace(os.sep, "/")
+        cut = path.rfind("/")
+        for offset, rules in reversed(self._chain(path[:cut] if cut != -1 else "")):
+            verdict = rules.match(path[offset:], is_dir)
+            if verdict is not None:
+                return verdict
+        return False
+
+    def _chain(self, folder):
+        """Return the ignore rules that apply inside folder, shallowest first."""
+        chain = self._chains.get(folder)
+        if chain is None:
+            if folder:
+                cut = folder.rfind("/")
+                chain = list(self._chain(folder[:cut] if cut != -1 else ""))
+                offset = len(folder) + 1
+            else:
+                chain = []
+                offset = 0
+            rules = self._load(folder)
+            if rules is not None:
+                chain.append((offset, rules))
+            # Worker threads may race here; both compute the same chain
+            self._chains[folder] = chain
+        return chain
+
+    def _load(self, folder):
+        base = os.path.join(self._top, *folder.split("/")) if folder else self._top
+        names = IGNORE_FILES if folder else (os.path.join(".git", "info", "exclude"), *IGNORE_FILES)
+        patterns = []
+        for name in names:
+            try:
+                with open(os.path.join(base, name), encoding="utf-8", errors="replace") as f:
+                    patterns.extend(p for p in map(parse_pattern, f) if p is not None)
+            except OSError:
+                continue
+        return IgnoreRules(patterns) if patterns else None
+
+
+def make_matcher(root, folders=(), extensions=(), respect_gitignore=False):
+    """Return the matcher a walk of root should use."""
+    if respect_gitignore:
+        return GitignoreMatcher(root, folders, extensions)
+    return IgnoreMatcher(folders, extensions)
@@ -0,0 +1,416 @@
+"""
+One walk, several tools.
+
+A Pipeline walks the source tree once and hands every entry to a chain of
+stages in order. Running the annotator, the flattener and the tree
+visualizer one after another walks the tree three times and reads every
+annotated file twice. In a pipeline the tree is listed once, and
+AnnotateStage writes the annotated bytes straight into the copies that
+FlattenStage planned for the file, so each annotated file is read once.
+
+    stages = [AnnotateStage(), FlattenStage("flat"), TreeStage("tree.txt")]
+    summaries = Pipeline("project", stages, ignore=["node_modules"]).run()
+
+Each stage works out what it will do with an entry in plan() before any
+stage processes it in process(), which is how a later stage can ask an
+earlier one to write its output.
+
+Pipeline.watch() keeps the outputs current afterwards: only the paths
+that changed go through the stages again, and stages drop the outputs of
+deleted files in remove().
+"""
+
+import os
+
+from toolbox_common import progress, stats, walker
+from toolbox_common.gitignore import make_matcher
+from toolbox_common.scripts import load_script
+from toolbox_common.walker import walk
+
+_tools = {}
+
+
+def tool(name):
+    """Return one of the toolbox scripts as a module, imported once per process."""
+    if name not in _tools:
+        _tools[name] = load_script(name)
+    return _tools[name]
+
+
+class Item:
+    """One walked entry on its way through the stages.
+
+    copies lists the files that should end up with the entry's final
+    content; a stage that writes some of them adds them to written so later
+    stages can leave them alone.
+    """
+
+    __slots__ = ("entry", "copies", "written")
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.copies = []
+        self.written = set()
+
+
+class Stage:
+    """Base class for pipeline stages; every hook is optional."""
+
+    name = "stage"
+
+    # Files and folders the stage writes; the pipeline never reads them as input
+    outputs = ()
+
+    def start(self, pipeline):
+        """Called before the walk, and again if a watch has to start over."""
+        self.pipeline = pipeline
+
+    def plan(self, item):
+        """Called for every entry before any stage processes it."""
+
+    def process(self, item):
+        """Called for every entry, in stage order."""
+
+    def error(self, path, depth, error):
+        """Called for a folder that could not be listed; depth is where its contents would be."""
+
+    def remove(self, rel_path, is_dir):
+        """Called while watching for a file or folder (with everything in it) that is gone.
+
+        Returns True if the stage had anything for it.
+        """
+        return False
+
+    def refresh(self):
+        """Called while watching after each batch of changes."""
+
+    def finish(self):
+        """Called once after the walk; returns the stage's summary."""
+        return None
+
+
+class AnnotateStage(Stage):
+    """Adds or updates the path comment of supported files, and fills their planned copies."""
+
+    name = "annotate"
+
+    def __init__(self, extensions=None):
+        self.tool = tool("annotate")
+        self.extensions = set(extensions or self.tool.DEFAULT_EXTENSIONS)
+        self.summary = {"annotated": 0, "failed": 0}
+
+    def process(self, item):
+        entry = item.entry
+        if entry.is_dir or not self.tool.is_supported_file(entry.name, self.extensions):
+            return
+        # Files without a comment style are left for later stages to copy as they are
+        pending = [path for path in item.copies if path not in item.written]
+        if os.path.splitext(entry.name)[1] not in self.tool.LANGUAGES:
+            pending = []
+        try:
+            with stats.current.track_file(entry.path, "annotate"):
+                status = self.tool.annotate_copy(entry.path, entry.rel_path, pending)
+        except Exception as e:
+            self.summary["failed"] += 1
+            print(f"Failed to process {entry.path}: {e}")
+            return
+        item.written.update(pending)
+        self.summary["annotated"] += 1
+        if not progress.current.enabled:
+            with stats.current.phase("print"):
+                print(status)
+
+    def finish(self):
+        return self.summary
+
+
+class FlattenStage(Stage):
+    """Copies every file into dest_dir under its flattened name, like file_flattener.py.
+
+    With link_mode 'copy' an earlier AnnotateStage writes the copy; other
+    link modes link to the annotated source file instead. Incremental
+    runs, deduplication and archives are only available in the flattener
+    itself.
+    """
+
+    name = "flatten"
+
+    def __init__(self, dest_dir, link_mode="copy"):
+        self.tool = tool("flatten")
+        self.dest_dir = os.path.abspath(dest_dir)
+        self.link_mode = link_mode
+        self.place = self.tool.make_placer(link_mode)
+        self.outputs = (self.dest_dir,)
+        self.planned = None
+
+    def start(self, pipeline):
+        super().start(pipeline)
+        if not os.path.exists(self.dest_dir):
+            os.makedirs(self.dest_dir)
+            print(f"Created destination directory: {self.dest_dir}")
+        self.summary = {"copied": 0, "failed": 0, "removed": 0, "collisions": [], "truncated": []}
+        # When a watch starts over, outputs of files that vanished meanwhile are removed in finish()
+        self.previous = getattr(self, "dests", {})
+        # Output of every source file, so a watch can find what to replace or delete
+        self.dests = {}
+        self.taken = set()
+        self.flat_name = self.tool.make_namer(pipeline.source, self.dest_dir, self.summary, self.taken)
+
+    def plan(self, item):
+        self.planned = None
+        rel_path = item.entry.rel_path
+        if item.entry.is_dir:
+            return
+        if rel_path not in self.dests:
+            _, self.dests[rel_path] = self.flat_name(rel_path)
+        self.planned = self.dests[rel_path]
+        if self.link_mode == "copy":
+            item.copies.append(self.planned)
+
+    def process(self, item):
+        if self.planned is None:
+            return
+        src_file, dest_file = item.entry.path, self.planned
+        error = None
+        if dest_file not in item.written:
+            error = self.tool.copy_file(src_file, dest_file, place=self.place)
+        if error is not None:
+            self.summary["failed"] += 1
+            print(f"Error copying {src_file}: {error}")
+            return
+        item.written.add(dest_file)
+        self.summary["copied"] += 1
+        if not progress.current.enabled:
+            with stats.current.phase("print"):
+                print(f"Copied: {src_file} -> {dest_file}")
+
+    def remove(self, rel_path, is_dir):
+        prefix = rel_path + os.sep
+        gone = [rel for rel in self.dests if rel == rel_path or (is_dir and rel.startswith(prefix))]
+        for rel in gone:
+            dest_file = self.dests.pop(rel)
+            self.taken.discard(os.path.basename(dest_file).casefold())
+            self.remove_output(dest_file)
+        return bool(gone)
+
+    def remove_output(self, dest_file):
+        try:
+            os.remove(dest_file)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"Error removing {dest_file}: {e}")
+            return
+        self.summary["removed"] += 1
+        print(f"Removed: {dest_file}")
+
+    def finish(self):
+        current = set(self.dests.values())
+        for rel, dest_file in self.previous.items():
+            if rel not in self.dests and dest_file not in current:
+                self.remove_output(dest_file)
+        self.previous = {}
+        return self.summary
+
+
+class TreeStage(Stage):
+    """Records every entry and writes the tree_visualizer.py listing when the walk is done.
+
+    output is a file path, or '-' to print the tree. The tree shows the
+    entries the walk saw, so files changed by earlier stages are listed as
+    they are after the run.
+    """
+
+    name = "tree"
+
+    def __init__(self, output="-"):
+        self.tool = tool("tree")
+        self.output = output
+        self.outputs = () if output == "-" else (os.path.abspath(output),)
+
+    def start(self, pipeline):
+        super().start(pipeline)
+        # {path components: (kind, name)}; sorting the keys gives the walk order
+        self.records = {}
+
+    def plan(self, item):
+        entry = item.entry
+        if entry.ignored:
+            kind = "ignored"
+        elif entry.is_dir:
+            kind = "link" if entry.is_symlink() else "dir"
+        else:
+            kind = "file"
+        self.records[tuple(entry.rel_path.split(os.sep))] = (kind, entry.name)
+
+    def error(self, path, depth, error):
+        rel_dir = os.path.relpath(path, self.pipeline.source)
+        key = () if rel_dir == "." else tuple(rel_dir.split(os.sep))
+        # The empty name sorts before every entry of the folder
+        self.records[key + ("",)] = ("error", self.tool.scan_error_label(error, color=False))
+
+    def remove(self, rel_path, is_dir):
+        key = tuple(rel_path.split(os.sep))
+        found = self.records.pop(key, None) is not None
+        if is_dir:
+            for other in [k for k in self.records if k[:len(key)] == key]:
+                del self.records[other]
+                found = True
+        return found
+
+    def refresh(self):
+        self.finish()
+
+    def finish(self):
+        records = [(len(key), kind, name) for key, (kind, name) in sorted(self.records.items())]
+        lines = self.tool.iter_listing_lines(self.pipeline.root_label, records)
+        with stats.current.phase("print"):
+            if self.output == "-":
+                for line in lines:
+                    print(line)
+            else:
+                with open(self.output, "w", encoding="utf-8") as f:
+                    for line in lines:
+                        f.write(line + "\n")
+        return {"entries": len(self.records), "output": self.output}
+
+
+class Pipeline:
+    """Walks source once and runs every entry through stages.
+
+    ignore, ignore_ext and respect_gitignore build the one matcher all
+    stages share, as in the individual tools.
+    """
+
+    def __init__(self, source, stages, ignore=(), ignore_ext=(), respect_gitignore=False):
+        self.root_label = source
+        self.source = os.path.abspath(source)
+        self.stages = list(stages)
+        self.matcher = make_matcher(self.source, ignore, ignore_ext, respect_gitignore)
+        self.outputs = tuple(path for stage in self.stages for path in stage.outputs)
+        # (size, mtime_ns) of every file a watch processed, so its own writes are not processed again
+        self.settled = {}
+
+    def count(self):
+        """Return the (files, bytes) run() will process, for progress totals."""
+        return progress.prescan(self.source, self.matcher)
+
+    def is_output(self, path):
+        """True if path is, or is inside, something a stage writes."""
+        return any(path == output or path.startswith(output + os.sep) for output in self.outputs)
+
+    def on_error(self, path, error):
+        rel = os.path.relpath(path, self.source)
+        depth = 1 if rel == "." else rel.count(os.sep) + 2
+        for stage in self.stages:
+            stage.error(path, depth, error)
+
+    def feed(self, entry):
+        """Send one entry through every stage."""
+        if self.is_output(entry.path):
+            return False
+        item = Item(entry)
+        for stage in self.stages:
+            stage.plan(item)
+        for stage in self.stages:
+            stage.process(item)
+        return True
+
+    def run(self):
+        """Walk the tree once; return {stage name: summary}."""
+        for stage in self.stages:
+            stage.start(self)
+
+        prune = self.is_output if self.outputs else None
+        entries = walk(self.source, self.matcher, include_ignored=True, on_error=self.on_error,
+                       prune=prune and (lambda entry: prune(entry.path)))
+        for entry in entries:
+            if not self.feed(entry):
+                continue
+            if not entry.is_dir:
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    size = 0
+                progress.current.advance(entry.path, size)
+
+        return {stage.name: stage.finish() for stage in self.stages}
+
+    def lookup(self, rel_path):
+        """Return the WalkEntry for rel_path, or None if it is gone or ignored."""
+        rel_dir, name = os.path.split(rel_path)
+        depth = rel_dir.count(os.sep) + 2 if rel_dir else 1
+        try:
+            entries = walker.scan_dir(os.path.join(self.source, rel_dir), self.matcher, rel_dir, depth, sort=False)
+        except OSError:
+            return None
+        for entry in entries:
+            if entry.name == name:
+                return entry
+        return None
+
+    def update(self, batch):
+        """Bring the outputs up to date with one batch of changes from toolbox_common.watch."""
+        if "rescan" in batch.values():
+            self.settled.clear()
+            self.run()
+            return
+        handled = False
+        for rel_path, event in batch.items():
+            if self.is_output(os.path.join(self.source, rel_path)):
+                continue
+            entry = None if event in ("deleted", "dir_removed") else self.lookup(rel_path)
+            if entry is None or entry.is_dir != (event == "dir_added"):
+                # Gone again, ignored, or replaced by the other kind of entry
+                self.settled.pop(rel_path, None)
+                for stage in self.stages:
+                    handled = stage.remove(rel_path, True) or handled
+                if entry is None:
+                    continue
+            handled = self.settle(entry) or handled
+            if entry.is_dir and not entry.ignored and not entry.is_symlink():
+                for child in walk(self.source, self.matcher, include_ignored=True, on_error=self.on_error,
+                                  start_dir=rel_path):
+                    self.settle(child)
+        # Events caused by the stages' own writes must not start another round
+        if handled:
+            for stage in self.stages:
+                stage.refresh()
+
+    def settle(self, entry):
+        """Feed a changed entry to the stages unless this pipeline wrote it last; return True if fed."""
+        if entry.is_dir:
+            return self.feed(entry)
+        try:
+            st = entry.stat()
+        except OSError:
+            return False
+        if self.settled.get(entry.rel_path) == (st.st_size, st.st_mtime_ns):
+            return False
+        if not self.feed(entry):
+            return False
+        try:
+            st = os.stat(entry.path)
+        except OSError:
+            return True
+        self.settled[entry.rel_path] = (st.st_size, st.st_mtime_ns)
+        return True
+
+    def watch(self, debounce=None, poll=False, poll_interval=None):
+        """Watch the source after run() and process every change until interrupted.
+
+        debounce and poll_interval default to toolbox_common.watch's
+        DEBOUNCE and POLL_INTERVAL; poll forces the polling watcher.
+        """
+        from toolbox_common import watch
+
+        if debounce is None:
+            debounce = watch.DEBOUNCE
+        if poll_interval is None:
+            poll_interval = watch.POLL_INTERVAL
+        watcher = watch.make_watcher(self.source, self.matcher, poll, poll_interval)
+        try:
+            for batch in watcher.batches(debounce):
+                self.update(batch)
+        finally:
+            watcher.close()
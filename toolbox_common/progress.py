@@ -0,0 +1,210 @@
+"""
+Machine-readable progress events for the toolbox scripts.
+
+With --progress a script writes JSON lines like
+
+    {"progress": "copy", "files_done": 120, "files_total": 5000, "bytes_done": 1048576,
+     "bytes_total": 73400320, "path": "src/app.py", "elapsed": 1.52,
+     "files_per_s": 78.9, "bytes_per_s": 689852.6, "eta": 61.8, "done": false}
+
+to stderr instead of one line per file. Events are rate-limited to one per
+EVENT_INTERVAL seconds plus a final one with "done": true. The totals are
+null unless --prescan counted the work first; "eta" is null without them.
+
+Like stats, code reports to the module-level ``current`` reporter, which
+ignores everything until a script enables it.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+from toolbox_common.walker import walk
+
+# Every event line starts with this, so readers can tell events from other output
+EVENT_PREFIX = '{"progress"'
+
+# Shortest time between two events
+EVENT_INTERVAL = 0.2
+
+
+class NullProgress:
+    """Reporter used while progress events are off; every call is a no-op."""
+
+    enabled = False
+
+    def start(self, phase, files_total=None, bytes_total=None):
+        pass
+
+    def next_phase(self, phase):
+        pass
+
+    def advance(self, path, size=None, files=1):
+        pass
+
+    def finish(self):
+        pass
+
+
+class JsonProgress:
+    """Writes progress events as JSON lines. Safe to use from several threads."""
+
+    enabled = True
+
+    def __init__(self, stream=None, interval=EVENT_INTERVAL):
+        self.stream = stream
+        self.interval = interval
+        self._lock = threading.Lock()
+        self.start("start")
+
+    def start(self, phase, files_total=None, bytes_total=None):
+        """Begin a phase with the given totals (None when unknown) and emit an event."""
+        with self._lock:
+            self.phase = phase
+            self.files_total = files_total
+            self.bytes_total = bytes_total
+            self.files_done = 0
+            self.bytes_done = 0
+            self.started = time.monotonic()
+            self.last_event = 0.0
+            self.path = None
+        if phase != "start":
+            self.emit()
+
+    def next_phase(self, phase):
+        """Start phase with the same totals, for tools that go over the same work twice."""
+        self.start(phase, self.files_total, self.bytes_total)
+
+    def advance(self, path, size=None, files=1):
+        """Count files (and size bytes) as done; path is the file just finished.
+
+        With size None the file is stat'ed for it.
+        """
+        if size is None:
+            try:
+                size = os.lstat(path).st_size
+            except OSError:
+                size = 0
+        with self._lock:
+            self.files_done += files
+            self.bytes_done += size
+            self.path = path
+            due = time.monotonic() - self.last_event >= self.interval
+        if due:
+            self.emit()
+
+    def finish(self):
+        self.emit(done=True)
+
+    def event(self, done=False):
+        """Return the current state as an event dict."""
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            files_rate = self.files_done / elapsed if elapsed > 0 else None
+            bytes_rate = self.bytes_done / elapsed if elapsed > 0 else None
+            eta = None
+            if self.bytes_total and bytes_rate:
+                eta = max(0.0, (self.bytes_total - self.bytes_done) / bytes_rate)
+            elif self.files_total and files_rate:
+                eta = max(0.0, (self.files_total - self.files_done) / files_rate)
+            return {
+                "progress": self.phase,
+                "files_done": self.files_done,
+                "files_total": self.files_total,
+                "bytes_done": self.bytes_done,
+                "bytes_total": self.bytes_total,
+                "path": self.path,
+                "elapsed": round(elapsed, 3),
+                "files_per_s": None if files_rate is None else round(files_rate, 1),
+                "bytes_per_s": None if bytes_rate is None else round(bytes_rate, 1),
+                "eta": None if eta is None else round(eta, 1),
+                "done": done,
+            }
+
+    def emit(self, done=False):
+        line = json.dumps(self.event(done), ensure_ascii=False)
+        with self._lock:
+            self.last_event = time.monotonic()
+            # Looked up on every event so redirected stderr (the GUI worker) is honoured
+            stream = self.stream or sys.stderr
+            stream.write(line + "\n")
+            stream.flush()
+
+
+current = NullProgress()
+
+
+def enable(stream=None):
+    global current
+    current = JsonProgress(stream)
+    return current
+
+
+def disable():
+    global current
+    current = NullProgress()
+
+
+def prescan(root, matcher, accept=None, include_dirs=False, sizes=True):
+    """Count the files under root the tool would process; return (files, bytes).
+
+    Uses the same matcher as the real walk. accept(entry), when given,
+    further filters the files; include_dirs counts folders too. With
+    sizes=False nothing is stat'ed and bytes is None. Listings run on a
+    small thread pool.
+    """
+    files = 0
+    size = 0 if sizes else None
+    for entry in walk(root, matcher, sort=False, workers=4, prefetch_stat=sizes):
+        if entry.is_dir and not include_dirs:
+            continue
+        if accept is not None and not accept(entry):
+            continue
+        files += 1
+        if sizes and not entry.is_dir:
+            try:
+                size += entry.stat().st_size
+            except OSError:
+                pass
+    return files, size
+
+
+def add_arguments(parser):
+    """Add the --progress and --prescan options to an argparse parser."""
+    group = parser.add_argument_group("progress")
+    group.add_argument("--progress", action="store_true",
+                       help="Write JSON-lines progress events to stderr instead of a line per file")
+    group.add_argument("--prescan", action="store_true",
+                       help="With --progress, count the work first so events carry totals and an ETA")
+
+
+@contextmanager
+def reporting(args, phase, count=None):
+    """Emit progress events for the with block as requested by add_arguments options.
+
+    count() returns the (files, bytes) totals and is only called with
+    --prescan. Does nothing without --progress.
+    """
+    if not args.progress:
+        yield None
+        return
+
+    reporter = enable()
+    try:
+        if args.prescan and count is not None:
+            reporter.start("prescan")
+            files, size = count()
+            reporter.start(phase, files, size)
+        else:
+            reporter.start(phase)
+        yield reporter
+    finally:
+        # finish() writes to the output, which raises in a cancelled GUI job;
+        # the reporter must still be switched off for the next job
+        try:
+            reporter.finish()
+        finally:
+            disable()
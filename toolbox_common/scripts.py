@@ -0,0 +1,25 @@
+"""
+Access to the toolbox scripts as modules.
+
+The scripts live in folders whose names are not valid package names, so
+they are imported from their file paths.
+"""
+
+import os
+import importlib.util
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPTS = {
+    "tree": os.path.join(REPO_ROOT, "directory-tools", "tree_visualizer.py"),
+    "annotate": os.path.join(REPO_ROOT, "code-annotation-tools", "file_path_annotator.py"),
+    "flatten": os.path.join(REPO_ROOT, "file-management-tools", "file_flattener.py"),
+}
+
+
+def load_script(name):
+    """Import one of the toolbox scripts as a module."""
+    spec = importlib.util.spec_from_file_location(f"toolbox_{name}", SCRIPTS[name])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,143 @@
+"""
+Cold-start measurements for the toolbox scripts.
+
+--startup-report launches the script again in fresh interpreters: a few
+plain launches to time it against a bare interpreter, then launches with
+``-X importtime`` to show which imports the time goes to. The fastest of
+each is reported, so the numbers are stable enough to compare over time.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+# Launches timed per measurement; the fastest one counts
+DEFAULT_RUNS = 5
+
+# Top-level imports listed in the text report
+DEFAULT_TOP = 15
+
+
+def time_command(cmd, runs=DEFAULT_RUNS, cwd=None):
+    """Run cmd runs times; return (seconds, stderr) of the fastest run."""
+    # Imported here so that adding the option costs the scripts nothing
+    import subprocess
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, cwd=cwd)
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best[0]:
+            best = (seconds, result.stderr)
+    return best
+
+
+def parse_importtime(text):
+    """Parse ``-X importtime`` output into [(module, self_us, cumulative_us, depth)]."""
+    modules = []
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        try:
+            self_us = int(fields[0])
+            cumulative_us = int(fields[1])
+        except ValueError:
+            # The column header
+            continue
+        name = fields[2][1:]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        modules.append((name.strip(), self_us, cumulative_us, depth))
+    return modules
+
+
+def measure(target, runs=DEFAULT_RUNS, cwd=None, depth=0):
+    """Measure launching ``python *target``; return the report as a dict.
+
+    Times are in milliseconds. "imports_ms" is the total import time of the
+    fastest ``-X importtime`` run, and "imports" lists that run's imports
+    at the given nesting depth, slowest first, each including whatever it
+    imported in turn. Use depth=1 when target only imports one module.
+    """
+    interpreter, _ = time_command([sys.executable, "-c", "pass"], runs, cwd)
+    launch, _ = time_command([sys.executable, *target], runs, cwd)
+
+    modules = None
+    for _ in range(runs):
+        _, stderr = time_command([sys.executable, "-X", "importtime", *target], 1, cwd)
+        run = parse_importtime(stderr)
+        if modules is None or total_us(run) < total_us(modules):
+            modules = run
+    listed = sorted((m for m in modules if m[3] == depth), key=lambda m: m[2], reverse=True)
+
+    return {
+        "target": target,
+        "runs": runs,
+        "interpreter_ms": round(interpreter * 1000, 2),
+        "launch_ms": round(launch * 1000, 2),
+        "imports_ms": round(total_us(modules) / 1000, 2),
+        "imports": [{"module": name, "ms": round(cumulative / 1000, 2)} for name, _, cumulative, _ in listed],
+    }
+
+
+def total_us(modules):
+    return sum(cumulative for _, _, cumulative, depth in modules if depth == 0)
+
+
+def format_report(report, top=DEFAULT_TOP):
+    """Return a measure() report as human-readable lines."""
+    extra = report["launch_ms"] - report["interpreter_ms"]
+    lines = [
+        f"Startup report: {' '.join(report['target'])} (fastest of {report['runs']} launches)",
+        f"  Bare interpreter  {report['interpreter_ms']:>9.1f} ms",
+        f"  Launch            {report['launch_ms']:>9.1f} ms  (+{extra:.1f} ms)",
+        f"  Imports           {report['imports_ms']:>9.1f} ms",
+        "Slowest imports (including what they import):",
+    ]
+    for item in report["imports"][:top]:
+        lines.append(f"  {item['ms']:>9.1f} ms  {item['module']}")
+    return lines
+
+
+class StartupReportAction(argparse.Action):
+    """Print a startup report and exit, like argparse's --version.
+
+    Runs while the command line is parsed, so the script's required
+    arguments do not have to be given.
+    """
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS, help=None,
+                 metavar=None, target=None, cwd=None, depth=0):
+        super().__init__(option_strings, dest, nargs="?", const="text", choices=["text", "json"],
+                         default=default, help=help, metavar=metavar)
+        self.target = target
+        self.cwd = cwd
+        self.depth = depth
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        if getattr(sys, "frozen", False):
+            parser.exit(1, "--startup-report needs a Python interpreter; it does not work in a packaged build\n")
+        target = self.target or [os.path.abspath(sys.argv[0]), "--help"]
+        report = measure(target, cwd=self.cwd, depth=self.depth)
+        if values == "json":
+            print(json.dumps(report, indent=2))
+        else:
+            print("\n".join(format_report(report)))
+        parser.exit()
+
+
+def add_arguments(parser, target=None, cwd=None, depth=0):
+    """Add the --startup-report option to an argparse parser.
+
+    target is the command line to time after the interpreter; it defaults
+    to the running script with --help. cwd and depth are passed on to
+    measure().
+    """
+    parser.add_argument("--startup-report", action=StartupReportAction, metavar="FORMAT",
+                        target=target, cwd=cwd, depth=depth,
+                        help="Time how long the script takes to start and which imports it spends that on, "
+                             "then exit (FORMAT: text or json)")
@@ -0,0 +1,191 @@
+"""
+Run statistics for the toolbox scripts: per-phase wall time, counters and
+the slowest files and folders, plus optional cProfile output.
+
+Code reports to the module-level ``current`` collector. It is a NullStats
+that ignores everything until a script calls enable() (normally through
+collecting()), so the instrumentation costs next to nothing when no
+statistics were asked for.
+"""
+
+import sys
+import json
+import heapq
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+_NULL_CONTEXT = nullcontext()
+
+
+class NullStats:
+    """Collector used while statistics are off; every call is a no-op."""
+
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_CONTEXT
+
+    def track_file(self, path, phase):
+        return _NULL_CONTEXT
+
+    def add_time(self, name, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+
+class RunStats:
+    """Collects phase timings, counters and the slowest paths of one run.
+
+    Phase times are summed over all threads, so with worker pools a phase
+    can add up to more than the run's wall time. Safe to use from several
+    threads.
+    """
+
+    enabled = True
+
+    def __init__(self, slowest=10):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.phases = {}
+        self.counters = {}
+        self.slowest_limit = slowest
+        # phase -> min-heap of (seconds, path)
+        self._slowest = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Add the time spent inside the with block to phase name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    @contextmanager
+    def track_file(self, path, phase):
+        """Like phase(), and also rank path among the slowest paths of that phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.add_time(phase, seconds)
+            with self._lock:
+                slowest = self._slowest.setdefault(phase, [])
+                if len(slowest) < self.slowest_limit:
+                    heapq.heappush(slowest, (seconds, path))
+                elif slowest and seconds > slowest[0][0]:
+                    heapq.heapreplace(slowest, (seconds, path))
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            total = self.phases.setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def as_dict(self):
+        """Return the statistics as a JSON-serializable dict."""
+        end = self.finished if self.finished is not None else time.perf_counter()
+        with self._lock:
+            return {
+                "wall_seconds": round(end - self.started, 6),
+                "phases": {name: {"seconds": round(seconds, 6), "calls": calls}
+                           for name, (seconds, calls) in sorted(self.phases.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "slowest": {phase: [{"path": path, "seconds": round(seconds, 6)}
+                                    for seconds, path in sorted(heap, reverse=True)]
+                            for phase, heap in sorted(self._slowest.items())},
+            }
+
+    def format(self):
+        """Return the statistics as human-readable lines."""
+        data = self.as_dict()
+        lines = [f"Wall time: {data['wall_seconds']:.3f}s"]
+        if data["phases"]:
+            lines.append("Phases (summed over threads):")
+            for name, phase in data["phases"].items():
+                lines.append(f"  {name:<12} {phase['seconds']:>10.3f}s  {phase['calls']:>9,} calls")
+        if data["counters"]:
+            lines.append("Counters:")
+            for name, value in data["counters"].items():
+                lines.append(f"  {name:<16} {value:>14,}")
+        for phase, items in data["slowest"].items():
+            lines.append(f"Slowest {phase}:")
+            for item in items:
+                lines.append(f"  {item['seconds'] * 1000:>9.1f} ms  {item['path']}")
+        return lines
+
+
+current = NullStats()
+
+
+def enable(slowest=10):
+    """Start collecting statistics and return the new collector."""
+    global current
+    current = RunStats(slowest)
+    return current
+
+
+def disable():
+    global current
+    current = NullStats()
+
+
+def add_arguments(parser):
+    """Add the --stats, --stats-json, --slowest and --profile options to an argparse parser."""
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--stats", action="store_true",
+                       help="Print phase timings, counters and the slowest files and folders to stderr when done")
+    group.add_argument("--stats-json", metavar="FILE",
+                       help="Write the same statistics as JSON to FILE ('-' for stderr)")
+    group.add_argument("--slowest", type=int, default=10, metavar="N",
+                       help="Number of slowest files and folders to report per phase (default: 10)")
+    group.add_argument("--profile", metavar="FILE",
+                       help="Run under cProfile and save the profile to FILE (read it with pstats or snakeviz)")
+
+
+@contextmanager
+def collecting(args):
+    """Collect statistics for the with block as requested by add_arguments options.
+
+    Does nothing unless --stats, --stats-json or --profile was given. The
+    report is written when the block exits, even if it raised.
+    """
+    if not (args.stats or args.stats_json or args.profile):
+        yield None
+        return
+
+    run = enable(args.slowest)
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield run
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        run.stop()
+        disable()
+        if args.stats:
+            print("\n".join(["-" * 50, *run.format()]), file=sys.stderr)
+        if args.profile:
+            print(f"Profile saved to {args.profile}", file=sys.stderr)
+        if args.stats_json == "-":
+            print(json.dumps(run.as_dict(), indent=2), file=sys.stderr)
+        elif args.stats_json:
+            with open(args.stats_json, "w", encoding="utf-8") as f:
+                json.dump(run.as_dict(), f, indent=2)
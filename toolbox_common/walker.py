@@ -0,0 +1,204 @@
+"""
+Shared directory walker for the toolbox scripts.
+
+All tools walk a tree the same way: os.scandir listings, one precompiled
+ignore matcher, and compact WalkEntry records that keep the type and stat
+data the scan already fetched.
+"""
+
+import os
+
+from toolbox_common import stats
+
+
+class IgnoreMatcher:
+    """Decides which folders and files a walk skips.
+
+    folders are exact folder names. extensions are matched as suffixes,
+    case-insensitively, so ".gz" and ".tar.gz" both work and the leading dot
+    is optional. names are exact file names (e.g. ".DS_Store").
+    """
+
+    __slots__ = ("folders", "extensions", "names")
+
+    # Folder the matcher's rel_path arguments are relative to, for matchers
+    # that need one (see toolbox_common.gitignore)
+    root = None
+
+    def __init__(self, folders=(), extensions=(), names=()):
+        self.folders = frozenset(folders)
+        self.extensions = frozenset(
+            (ext if ext.startswith(".") else f".{ext}").lower() for ext in extensions
+        )
+        self.names = frozenset(names)
+
+    def ignores_dir(self, name, rel_path=None):
+        return name in self.folders
+
+    def ignores_file(self, name, rel_path=None):
+        if name in self.names:
+            return True
+        if not self.extensions:
+            return False
+        # Look up every dotted suffix of the name: ".gz", ".tar.gz", ...
+        lower = name.lower()
+        i = lower.find(".")
+        while i != -1:
+            if lower[i:] in self.extensions:
+                return True
+            i = lower.find(".", i + 1)
+        return False
+
+
+class WalkEntry:
+    """One file or folder found by the walker.
+
+    rel_path is relative to the walk root and uses os.sep. is_dir follows
+    symlinks like os.path.isdir, but symlinked folders are never descended
+    into. ignored is True for folders the matcher skipped (only yielded
+    with include_ignored). stat() and inode() reuse the os.DirEntry cache.
+    """
+
+    __slots__ = ("name", "path", "rel_path", "is_dir", "ignored", "depth", "_dirent")
+
+    def __init__(self, dirent, rel_path, is_dir, ignored, depth):
+        self.name = dirent.name
+        self.path = dirent.path
+        self.rel_path = rel_path
+        self.is_dir = is_dir
+        self.ignored = ignored
+        self.depth = depth
+        self._dirent = dirent
+
+    def stat(self):
+        """Return the entry's lstat result, fetched at most once."""
+        return self._dirent.stat(follow_symlinks=False)
+
+    def inode(self):
+        return self._dirent.inode()
+
+    def is_symlink(self):
+        return self._dirent.is_symlink()
+
+    def __repr__(self):
+        return f"WalkEntry({self.rel_path!r}, is_dir={self.is_dir})"
+
+
+def scan_dir(path, matcher=None, rel_dir="", depth=1, sort=True, prefetch_stat=False):
+    """List one directory as WalkEntry records.
+
+    Files the matcher ignores are dropped; ignored folders are kept with
+    ignored=True so callers can show them. Entries are sorted by name when
+    sort is set. With prefetch_stat every file is stat'ed now, which lets a
+    worker thread do that work. Raises OSError if path cannot be listed.
+    """
+    run = stats.current
+    entries = []
+    with run.track_file(path, "list"):
+        with os.scandir(path) as it:
+            for dirent in it:
+                rel_path = os.path.join(rel_dir, dirent.name) if rel_dir else dirent.name
+                try:
+                    is_dir = dirent.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if is_dir:
+                    ignored = matcher is not None and matcher.ignores_dir(dirent.name, rel_path)
+                    entries.append(WalkEntry(dirent, rel_path, True, ignored, depth))
+                    continue
+                if matcher is not None and matcher.ignores_file(dirent.name, rel_path):
+                    continue
+                if prefetch_stat:
+                    try:
+                        dirent.stat(follow_symlinks=False)
+                    except OSError:
+                        pass
+                entries.append(WalkEntry(dirent, rel_path, False, False, depth))
+
+    run.count("dirs_listed")
+    run.count("entries_listed", len(entries))
+    if sort:
+        entries.sort(key=lambda entry: entry.name)
+    return entries
+
+
+def walk(root, matcher=None, sort=True, include_ignored=False, prune=None,
+         workers=1, prefetch_stat=False, on_error=None, start_dir=""):
+    """Yield a WalkEntry for every file and folder below root.
+
+    Entries come out depth-first: each folder is yielded right before its
+    contents. With sort the order is by name at every level, so two walks
+    of the same tree give the same sequence.
+
+    prune(entry) is called for every folder; returning True yields the
+    folder but skips its contents. on_error(path, error) is called for
+    folders that cannot be listed.
+
+    With workers > 1 the listings of a folder's subfolders are fetched on a
+    thread pool while the caller is still busy with earlier entries, which
+    hides latency on network filesystems. prefetch_stat also moves the
+    per-file stat calls onto those threads.
+
+    start_dir, a folder below root relative to it, limits the walk to that
+    folder's contents; rel_path and depth stay relative to root.
+    """
+    pool = None
+    if workers > 1:
+        # concurrent.futures pulls in logging; only pay for it when threads are used
+        from concurrent.futures import ThreadPoolExecutor
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    def listing(path, rel_dir, depth):
+        try:
+            return scan_dir(path, matcher, rel_dir, depth, sort, prefetch_stat)
+        except OSError as e:
+            if on_error is not None:
+                on_error(path, e)
+            return []
+
+    def start(path, rel_dir, depth):
+        if pool is None:
+            return listing(path, rel_dir, depth)
+        return pool.submit(listing, path, rel_dir, depth)
+
+    def result(pending):
+        return pending.result() if pool is not None else pending
+
+    def expand(entries):
+        """Start listing every subfolder of a listing that will be descended into."""
+        prefetched = {}
+        if pool is not None:
+            for entry in entries:
+                if entry.is_dir and not entry.ignored and not entry.is_symlink():
+                    prefetched[entry.path] = start(entry.path, entry.rel_path, entry.depth + 1)
+        return prefetched
+
+    try:
+        start_depth = start_dir.count(os.sep) + 2 if start_dir else 1
+        first = result(start(os.path.join(root, start_dir) if start_dir else root, start_dir, start_depth))
+        stack = [(first, 0, expand(first))]
+        while stack:
+            entries, i, prefetched = stack.pop()
+            if i >= len(entries):
+                continue
+            stack.append((entries, i + 1, prefetched))
+            entry = entries[i]
+
+            if entry.ignored:
+                if include_ignored:
+                    yield entry
+                continue
+            yield entry
+
+            if not entry.is_dir or entry.is_symlink():
+                continue
+            if prune is not None and prune(entry):
+                prefetched.pop(entry.path, None)
+                continue
+            pending = prefetched.pop(entry.path, None)
+            children = result(pending) if pending is not None else listing(entry.path, entry.rel_path, entry.depth + 1)
+            stack.append((children, 0, expand(children)))
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,273 @@
+"""
+Change notifications for a watched source tree.
+
+On Linux the kernel's inotify API is used through ctypes, with a watch
+on every folder the matcher does not ignore, so an idle watch costs no
+CPU at all. Elsewhere, or when inotify is unavailable (e.g. the
+per-user watch limit is reached), the tree is polled: walked every
+POLL_INTERVAL seconds and compared with the previous walk.
+
+Either way changes come out in debounced batches: after the first event
+the watcher waits until the tree has been quiet for the debounce time,
+so an editor's save or a checkout of many files is handled once. A batch
+is a dict {rel_path: event}, in the order the last event for each path
+arrived, with these events:
+
+    "changed"      a file was created, written or moved in
+    "deleted"      a file was deleted or moved out
+    "dir_added"    a folder was created or moved in (its contents may be new)
+    "dir_removed"  a folder was deleted or moved out, with all its contents
+    "rescan"       events were lost; rel_path is "" and everything should be redone
+
+A rename is reported as "deleted" for the old path and "changed" (or
+"dir_removed" and "dir_added") for the new one.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+
+from toolbox_common.walker import walk
+
+# Seconds without events that end a batch
+DEBOUNCE = 0.5
+
+# Seconds between two walks of the polling watcher
+POLL_INTERVAL = 1.0
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+
+# struct inotify_event without its name: wd, mask, cookie, len
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def add_event(batch, rel_path, event):
+    """Record event as the latest for rel_path, keeping the batch in arrival order."""
+    batch.pop(rel_path, None)
+    batch[rel_path] = event
+
+
+class InotifyWatcher:
+    """Watches root with inotify. Raises OSError if that is not possible."""
+
+    def __init__(self, root, matcher):
+        import ctypes
+        import ctypes.util
+
+        self.root = root
+        self.matcher = matcher
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.libc = libc
+        self.libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise self.error("inotify_init1")
+        self.dirs = {}
+        try:
+            self.add_tree("")
+        except OSError:
+            self.close()
+            raise
+
+    def error(self, call):
+        import ctypes
+        code = ctypes.get_errno()
+        return OSError(code, f"{call}: {os.strerror(code)}")
+
+    def add_dir(self, rel_dir):
+        path = os.path.join(self.root, rel_dir) if rel_dir else self.root
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = self.error("inotify_add_watch")
+            # A folder that is already gone is reported by its parent's events
+            if error.errno in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise error
+        self.dirs[wd] = rel_dir
+
+    def add_tree(self, rel_dir):
+        """Watch rel_dir and every folder below it that the matcher keeps."""
+        self.add_dir(rel_dir)
+        for entry in walk(self.root, self.matcher, start_dir=rel_dir):
+            if entry.is_dir and not entry.is_symlink():
+                self.add_dir(entry.rel_path)
+
+    def rebuild(self):
+        """Drop every watch and watch the whole tree again.
+
+        Used after events were lost: folders created or moved meanwhile
+        would otherwise never be watched, and moved ones would be watched
+        under their old paths.
+        """
+        for wd in list(self.dirs):
+            self.libc.inotify_rm_watch(self.fd, wd)
+        self.dirs.clear()
+        self.add_tree("")
+
+    def remove_tree(self, rel_dir):
+        """Stop watching rel_dir and the folders below it."""
+        prefix = rel_dir + os.sep
+        for wd, path in list(self.dirs.items()):
+            if path == rel_dir or path.startswith(prefix):
+                del self.dirs[wd]
+                self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, batch):
+        """Read whatever events are queued into batch; return False if none were."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            self.handle(batch, wd, mask, name)
+        return True
+
+    def handle(self, batch, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            add_event(batch, "", "rescan")
+            return
+        if mask & IN_IGNORED:
+            self.dirs.pop(wd, None)
+            return
+        rel_dir = self.dirs.get(wd)
+        if rel_dir is None or not name:
+            # Events on a watched folder itself are reported by its parent
+            return
+        rel_path = os.path.join(rel_dir, name) if rel_dir else name
+
+        if mask & IN_ISDIR:
+            if self.matcher.ignores_dir(name, rel_path):
+                return
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_tree(rel_path)
+                add_event(batch, rel_path, "dir_added")
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.remove_tree(rel_path)
+                add_event(batch, rel_path, "dir_removed")
+            return
+
+        if self.matcher.ignores_file(name, rel_path):
+            return
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            add_event(batch, rel_path, "deleted")
+        else:
+            add_event(batch, rel_path, "changed")
+
+    def batches(self, debounce=DEBOUNCE):
+        """Yield batches of changes forever; blocks without using CPU between them."""
+        while True:
+            batch = {}
+            select.select([self.fd], [], [])
+            self.read_events(batch)
+            while True:
+                ready, _, _ = select.select([self.fd], [], [], debounce)
+                if not ready:
+                    break
+                self.read_events(batch)
+            if "rescan" in batch.values():
+                # Watch the tree as it is now before the caller walks it again
+                self.rebuild()
+            if batch:
+                yield batch
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """Watches root by walking it every poll_interval seconds."""
+
+    def __init__(self, root, matcher, poll_interval=POLL_INTERVAL):
+        self.root = root
+        self.matcher = matcher
+        self.poll_interval = poll_interval
+        self.state = self.scan()
+
+    def scan(self):
+        """Return {rel_path: None for folders, (size, mtime_ns) for files}."""
+        state = {}
+        for entry in walk(self.root, self.matcher):
+            if entry.is_dir:
+                state[entry.rel_path] = None
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            state[entry.rel_path] = (st.st_size, st.st_mtime_ns)
+        return state
+
+    def poll(self, batch):
+        """Walk the tree once and add what changed since the last walk to batch.
+
+        Returns False if nothing did.
+        """
+        state = self.scan()
+        changed = False
+        for rel_path, old in self.state.items():
+            if rel_path not in state:
+                add_event(batch, rel_path, "dir_removed" if old is None else "deleted")
+                changed = True
+        for rel_path, new in state.items():
+            old = self.state.get(rel_path, False)
+            if old is False:
+                add_event(batch, rel_path, "dir_added" if new is None else "changed")
+                changed = True
+            elif new != old:
+                add_event(batch, rel_path, "changed")
+                changed = True
+        self.state = state
+        return changed
+
+    def batches(self, debounce=DEBOUNCE):
+        """Yield batches of changes forever, polling between them."""
+        while True:
+            batch = {}
+            while not self.poll(batch):
+                time.sleep(self.poll_interval)
+            # Keep polling until a walk finds nothing new
+            while True:
+                time.sleep(max(debounce, self.poll_interval))
+                if not self.poll(batch):
+                    break
+            yield batch
+
+    def close(self):
+        pass
+
+
+def make_watcher(root, matcher, poll=False, poll_interval=POLL_INTERVAL):
+    """Return an inotify watcher for root, or a polling one if poll is set or inotify fails."""
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, matcher)
+        except OSError as e:
+            print(f"inotify unavailable ({e}); polling every {poll_interval:g}s instead")
+    return PollingWatcher(root, matcher, poll_interval)
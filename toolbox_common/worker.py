@@ -0,0 +1,269 @@
+"""
+Warm worker process for the GUI.
+
+The worker imports the three tools once and then runs jobs on request,
+calling build_tree-style functions directly instead of starting a fresh
+interpreter per run. Output is sent back over a pipe in small batches.
+
+Stop is cooperative first: the GUI sets a shared event and the next line a
+job prints raises Cancelled inside the job. A job that prints nothing for
+a while (hashing, size scans) is killed after a grace period, and a new
+worker is started for the next job.
+"""
+
+import os
+import time
+import threading
+import traceback
+import multiprocessing
+from contextlib import redirect_stdout, redirect_stderr
+from types import SimpleNamespace
+
+from toolbox_common.scripts import SCRIPTS, load_script
+
+# Output is sent to the GUI once this much is buffered or this much time has passed
+SEND_BYTES = 8192
+SEND_INTERVAL = 0.05
+
+# Seconds a cancelled job gets to stop on its own before the worker is killed
+CANCEL_GRACE = 3.0
+
+
+class Cancelled(BaseException):
+    """Raised inside a job when the GUI asked it to stop.
+
+    A BaseException, so the tools' own `except Exception` handlers let it through.
+    """
+
+
+class PipeWriter:
+    """File-like object that sends text to the GUI and checks for cancellation on every write."""
+
+    def __init__(self, conn, cancel_event):
+        self.conn = conn
+        self.cancel_event = cancel_event
+        self.buffer = []
+        self.size = 0
+        self.last_send = time.monotonic()
+
+    def write(self, text):
+        if self.cancel_event.is_set():
+            raise Cancelled()
+        self.buffer.append(text)
+        self.size += len(text)
+        if self.size >= SEND_BYTES or time.monotonic() - self.last_send >= SEND_INTERVAL:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self.buffer:
+            self.conn.send(("output", "".join(self.buffer)))
+            self.buffer = []
+            self.size = 0
+        self.last_send = time.monotonic()
+
+    def isatty(self):
+        return False
+
+
+def stats_options(enabled):
+    """The argparse-style options stats.collecting() expects."""
+    return SimpleNamespace(stats=enabled, stats_json=None, profile=None, slowest=10)
+
+
+def progress_options(enabled, prescan):
+    """The argparse-style options progress.reporting() expects."""
+    return SimpleNamespace(progress=enabled, prescan=prescan)
+
+
+def run_tree(tools, path, ignore=(), ignore_ext=(), respect_gitignore=False, stats=False, progress=False,
+             prescan=False):
+    tool = tools["tree"]
+    if not os.path.isdir(path):
+        print("[!] Error: Provided path is not a directory")
+        return
+
+    def count():
+        return tool.count_work(path, ignore, ignore_ext, respect_gitignore)
+
+    events = progress_options(progress, prescan)
+    with tool.stats.collecting(stats_options(stats)), tool.progress.reporting(events, "tree", count):
+        tool.stream_tree(path, ignore, ignore_ext, respect_gitignore=respect_gitignore)
+
+
+def run_annotate(tools, base_folder, make_copy=False, extensions=(), ignore=(), respect_gitignore=False,
+                 stats=False, progress=False, prescan=False):
+    tool = tools["annotate"]
+    base_folder = os.path.abspath(base_folder)
+    if make_copy:
+        base_folder = tool.make_working_copy(base_folder)
+    extensions = set(extensions or tool.DEFAULT_EXTENSIONS)
+    ignore = set(ignore or tool.IGNORED_FOLDERS)
+
+    def count():
+        return tool.count_work(base_folder, extensions, ignore, respect_gitignore)
+
+    events = progress_options(progress, prescan)
+    with tool.stats.collecting(stats_options(stats)), tool.progress.reporting(events, "annotate", count):
+        tool.process_directory(base_folder, extensions, ignore, respect_gitignore=respect_gitignore)
+
+
+def run_flatten(tools, source, destination, ignore=(), ignore_ext=(), respect_gitignore=False, stats=False,
+                progress=False, prescan=False):
+    tool = tools["flatten"]
+    if not os.path.isdir(source):
+        print(f"Error: Source directory '{source}' does not exist.")
+        return
+    print(f"Source: {os.path.abspath(source)}")
+    print(f"Destination: {os.path.abspath(destination)}")
+    print("-" * 50)
+
+    archive = tool.get_archive_format(destination)
+
+    def count():
+        return tool.count_work(source, ignore, ignore_ext, respect_gitignore)
+
+    events = progress_options(progress, prescan)
+    phase = "archive" if archive else "copy"
+    with tool.stats.collecting(stats_options(stats)), tool.progress.reporting(events, phase, count):
+        if archive:
+            summary = tool.archive_and_rename_files(source, destination, list(ignore), list(ignore_ext),
+                                                    respect_gitignore=respect_gitignore)
+        else:
+            summary = tool.copy_and_rename_files(source, destination, list(ignore), list(ignore_ext),
+                                                 respect_gitignore=respect_gitignore)
+    if archive:
+        tool.print_archive_summary(summary)
+    else:
+        tool.print_copy_summary(summary)
+
+
+JOBS = {
+    "tree": run_tree,
+    "annotate": run_annotate,
+    "flatten": run_flatten,
+}
+
+
+def worker_main(conn, cancel_event):
+    """Entry point of the worker process: import the tools, then serve jobs until told to quit."""
+    tools = {name: load_script(name) for name in SCRIPTS}
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message[0] == "quit":
+            return
+
+        _, job, options = message
+        # Each job starts without a reporter or collector left over from a stopped one
+        tools[job].progress.disable()
+        tools[job].stats.disable()
+        writer = PipeWriter(conn, cancel_event)
+        status = "ok"
+        try:
+            with redirect_stdout(writer), redirect_stderr(writer):
+                JOBS[job](tools, **options)
+        except Cancelled:
+            status = "cancelled"
+        except Exception:
+            writer.buffer.append(traceback.format_exc())
+            status = "error"
+        writer.flush()
+        conn.send(("done", status))
+
+
+class WarmWorker:
+    """Parent-side handle on the worker process, used from the GUI.
+
+    run() blocks until the job is done, so call it from a background thread.
+    """
+
+    def __init__(self):
+        self.context = multiprocessing.get_context("spawn")
+        self.process = None
+        self.conn = None
+        self.cancel_event = None
+        self.busy = False
+        # Counts jobs, so a stop timer can tell its job from the next one on the same process
+        self.job = 0
+        self.cancel_timer = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker if it is not running; it imports the tools while the GUI is idle."""
+        with self._lock:
+            if self.process is not None and self.process.is_alive():
+                return
+            self.conn, child_conn = self.context.Pipe()
+            self.cancel_event = self.context.Event()
+            self.process = self.context.Process(target=worker_main, args=(child_conn, self.cancel_event),
+                                                daemon=True)
+            self.process.start()
+            child_conn.close()
+
+    def run(self, job, options, on_output):
+        """Run job with options, passing output text to on_output.
+
+        Returns "ok", "error", "cancelled" (stopped cooperatively) or
+        "killed" (the worker had to be terminated or died).
+        """
+        self.start()
+        self.cancel_event.clear()
+        self.job += 1
+        self.busy = True
+        # kill() may close and drop self.conn from the timer thread at any time
+        conn = self.conn
+        try:
+            conn.send(("run", job, options))
+            while True:
+                try:
+                    kind, payload = conn.recv()
+                except (EOFError, OSError):
+                    self.kill()
+                    return "killed"
+                if kind == "output":
+                    on_output(payload)
+                else:
+                    return payload
+        finally:
+            self.busy = False
+            if self.cancel_timer is not None:
+                self.cancel_timer.cancel()
+                self.cancel_timer = None
+
+    def cancel(self, grace=CANCEL_GRACE):
+        """Ask the running job to stop, and kill the worker if it has not stopped after grace seconds."""
+        if not self.busy:
+            return
+        self.cancel_event.set()
+        job = self.job
+
+        def kill_if_stuck():
+            if self.busy and self.job == job:
+                self.kill()
+
+        if self.cancel_timer is not None:
+            self.cancel_timer.cancel()
+        self.cancel_timer = threading.Timer(grace, kill_if_stuck)
+        self.cancel_timer.daemon = True
+        self.cancel_timer.start()
+
+    def kill(self):
+        with self._lock:
+            if self.process is not None:
+                self.process.terminate()
+                self.process.join(1)
+                self.process = None
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def shutdown(self):
+        if self.process is not None and not self.busy:
+            try:
+                self.conn.send(("quit",))
+            except OSError:
+                pass
+        self.kill()